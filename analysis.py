@@ -0,0 +1,140 @@
+"""This Python module contains the batch position-analysis API of Connect N project.
+
+It evaluates many positions offline (no Game, no pygame screen), which is useful to label position datasets
+or to compare engine changes against a fixed corpus of positions. Run it as a script to analyse a file with
+one position (move string) per line and print one JSON record per analysed position:
+
+    python analysis.py positions.txt --rows 6 --cols 7 --connect-n 4 --depth 6 --workers 4
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict, dataclass
+from functools import partial
+import json
+import multiprocessing
+import sys
+from typing import Iterable, Iterator, Optional, Sequence, Union
+
+from config import DEFAULT_CONFIG, GameConfig
+import engine
+import profiling
+
+# A position to analyse: a move string, a sequence of column indices, or a grid of fills (rows from top to bottom)
+PositionSpec = Union[str, Sequence[int], Sequence[Sequence[int]]]
+
+
+@dataclass
+class AnalysisResult:
+    """The analysis of one input position.
+
+    Instance Attributes:
+    - index: the index of the position in the input iterable, since results are returned as they finish
+    - moves: the move string of the position, or None if it was given as a grid
+    - best_move: the best column for the player to move, or None if the position is already over
+    - score: the score of best_move from the point of view of the player to move
+    - pv: the principal variation starting with best_move
+    - nodes: the number of positions searched
+    - error: a description of why the position could not be analysed, or None
+    """
+    index: int
+    moves: Optional[str]
+    best_move: Optional[int]
+    score: int
+    pv: list[int]
+    nodes: int
+    error: Optional[str] = None
+
+
+def to_position(spec: PositionSpec, game_config: GameConfig) -> engine.Position:
+    """Return the engine.Position described by spec under game_config. A grid keeps its own shape
+    and only takes connect_n from game_config.
+
+    Raise ValueError if spec is not a legal position.
+    """
+    if not isinstance(spec, str) and spec and not isinstance(spec[0], int):
+        return engine.Position.from_grid(spec, game_config.connect_n)
+    return engine.Position.from_moves(spec, game_config)
+
+
+def analyse_position(spec: PositionSpec, game_config: GameConfig = DEFAULT_CONFIG, depth: int = 4,
+                     index: int = 0) -> AnalysisResult:
+    """Search the position described by spec to depth and return its analysis.
+    An illegal position is reported through AnalysisResult.error instead of raising."""
+    try:
+        position = to_position(spec, game_config)
+    except (ValueError, IndexError) as error:
+        return AnalysisResult(index, None, None, 0, [], 0, str(error))
+    moves = engine.format_moves(position.moves) if position.moves or isinstance(spec, str) else None
+    result = engine.Searcher(depth).search(position)
+    return AnalysisResult(index, moves, result.best_move, result.score, result.pv, result.nodes)
+
+
+def _analyse_job(job: tuple[int, PositionSpec], game_config: GameConfig, depth: int) -> AnalysisResult:
+    """Analyse one (index, spec) job in a worker process"""
+    index, spec = job
+    return analyse_position(spec, game_config, depth, index)
+
+
+def analyse_positions(positions: Iterable[PositionSpec], game_config: GameConfig = DEFAULT_CONFIG, depth: int = 4,
+                      workers: Optional[int] = None, chunksize: int = 32) -> Iterator[AnalysisResult]:
+    """Analyse every position in positions and yield the results as soon as they finish.
+
+    The positions are dispatched to a pool of workers processes (one per CPU by default) in chunks of
+    chunksize positions, so results are NOT yielded in input order; use AnalysisResult.index to match them
+    back to the input. With workers=1 the positions are analysed in this process, in order.
+
+    Preconditions:
+    - workers is None or workers >= 1
+    - chunksize >= 1
+    """
+    job = partial(_analyse_job, game_config=game_config, depth=depth)
+    if workers == 1:
+        yield from map(job, enumerate(positions))
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(job, enumerate(positions), chunksize)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Analyse the move strings in the given file (or standard input) and print one JSON record per line"""
+    parser = argparse.ArgumentParser(description='Analyse Connect N positions given as move strings.')
+    parser.add_argument('file', nargs='?', help='file with one move string per line (default: standard input)')
+    parser.add_argument('--rows', type=int, default=DEFAULT_CONFIG.rows)
+    parser.add_argument('--cols', type=int, default=DEFAULT_CONFIG.cols)
+    parser.add_argument('--connect-n', type=int, default=DEFAULT_CONFIG.connect_n)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunksize', type=int, default=32)
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.configure_from_args(args)
+
+    with open(args.file) if args.file else sys.stdin as lines:
+        positions = (line.strip() for line in lines if line.strip())
+        game_config = GameConfig(args.rows, args.cols, args.connect_n)
+        for result in analyse_positions(positions, game_config, args.depth, args.workers, args.chunksize):
+            print(json.dumps(asdict(result)), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""This Python module contains the search benchmarks of Connect N project.
+
+Run it to measure how many positions the engine searches to a fixed depth on a fixed set of benchmark positions,
+for each combination of move ordering heuristics, to play a match between two search depths, and to measure
+random playout speed and game length on several board sizes:
+
+    python benchmarks.py --depth 6 --match 2 4 --games 20 --seed 2023 --playouts 2000
+
+Everything is seeded: the same seed gives the same positions and the same match games on every run and every
+machine, so two engine versions are timed on identical work. Each run prints a digest of its positions and
+games; equal digests confirm that two runs are comparable.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import hashlib
+import random
+import time
+from typing import Optional
+
+import constants
+from config import DEFAULT_CONFIG, GameConfig
+import engine
+import ordering
+import playouts
+import profiling
+
+# The (rows, cols, connect_n) board shapes compared by benchmark_playouts
+PLAYOUT_SHAPES = ((6, 7, 4), (8, 9, 4), (8, 9, 5), (11, 11, 4), (11, 11, 6))
+
+# The move ordering configurations compared by benchmark_ordering, as MoveOrderer keyword arguments
+ORDERINGS = {
+    'left-to-right': {'use_center': False, 'use_killers': False, 'use_history': False, 'use_threats': False},
+    'center': {'use_center': True, 'use_killers': False, 'use_history': False, 'use_threats': False},
+    'center+killers+history': {'use_center': True, 'use_killers': True, 'use_history': True,
+                               'use_threats': False},
+    'full': {}
+}
+
+
+def benchmark_positions(game_config: GameConfig = DEFAULT_CONFIG, count: int = 40,
+                        seed: int = 2023) -> list[engine.Position]:
+    """Return count reproducible benchmark positions: random games of 4 to 16 plies that are not over yet"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        position = engine.Position(game_config)
+        for _ in range(rng.randint(4, 16)):
+            position.play(rng.choice(position.valid_moves()))
+            if position.is_terminal():
+                break
+        if not position.is_terminal():
+            positions.append(position)
+    return positions
+
+
+def digest(move_sequences: list[list[int]]) -> str:
+    """Return a short digest of move_sequences, equal for two runs exactly when they played the same moves"""
+    text = '\n'.join(engine.format_moves(moves) for moves in move_sequences)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def benchmark_ordering(positions: list[engine.Position], depth: int) -> dict[str, tuple[int, float]]:
+    """Search every position to depth with each configuration in ORDERINGS and return, for each configuration,
+    the total number of positions searched and the total time in seconds. One Searcher is reused per
+    configuration, as it would be over the moves of a game."""
+    results = {}
+    for name, options in ORDERINGS.items():
+        searcher = engine.Searcher(depth, ordering.MoveOrderer(**options))
+        nodes, start = 0, time.perf_counter()
+        for position in positions:
+            nodes += searcher.search(position).nodes
+        results[name] = (nodes, time.perf_counter() - start)
+    return results
+
+
+def benchmark_playouts(games: int, seed: int = 2023) -> dict[tuple[int, int, int], tuple[playouts.MoveStats, float]]:
+    """Play games random playouts from the empty board of every shape in PLAYOUT_SHAPES and return, for each
+    shape, the combined results of every first move and the number of playouts per second"""
+    results = {}
+    for rows, cols, connect_n in PLAYOUT_SHAPES:
+        position = engine.Position(GameConfig(rows, cols, connect_n))
+        start = time.perf_counter()
+        combined = playouts.MoveStats()
+        for stats in playouts.simulate(position, max(1, games // cols), seed).values():
+            combined.add(stats)
+        results[(rows, cols, connect_n)] = (combined, combined.games / (time.perf_counter() - start))
+    return results
+
+
+@dataclass
+class MatchResult:
+    """The result of a match between two search depths.
+
+    Instance Attributes:
+    - depths: the search depths of the two contestants
+    - wins: the number of games won by each contestant
+    - draws: the number of drawn games
+    - seconds: the total time each contestant spent searching
+    - games: the moves of every game, in the order the games were played
+    """
+    depths: tuple[int, int]
+    wins: list[int]
+    draws: int
+    seconds: list[float]
+    games: list[list[int]]
+
+
+def play_match(depths: tuple[int, int], games: int, game_config: GameConfig = DEFAULT_CONFIG,
+               random_plies: int = 2, seed: int = 2023) -> MatchResult:
+    """Play games games between a Searcher of depth depths[0] and one of depth depths[1] and return the result.
+
+    The contestants swap sides every game. Each game opens with random_plies random moves drawn from a generator
+    seeded with (seed, game index), so the match is replayed exactly by the same arguments."""
+    searchers = [engine.Searcher(depth) for depth in depths]
+    result = MatchResult(depths, [0, 0], 0, [0.0, 0.0], [])
+    for game_index in range(games):
+        rng = random.Random(f'{seed}:{game_index}')
+        position = engine.Position(game_config)
+        # sides[player] is the index of the contestant playing player in this game
+        sides = {constants.PLAYER1: game_index % 2, constants.PLAYER2: 1 - game_index % 2}
+        while not position.is_terminal():
+            if len(position.moves) < random_plies:
+                position.play(rng.choice(position.valid_moves()))
+                continue
+            contestant = sides[position.turn]
+            start = time.perf_counter()
+            position.play(searchers[contestant].search(position).best_move)
+            result.seconds[contestant] += time.perf_counter() - start
+
+        winner = engine.other_player(position.turn)
+        if position.has_won(winner):
+            result.wins[sides[winner]] += 1
+        else:
+            result.draws += 1
+        result.games.append(list(position.moves))
+    return result
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the move ordering benchmark and print its results"""
+    parser = argparse.ArgumentParser(description='Benchmark the Connect N search engine.')
+    parser.add_argument('--rows', type=int, default=DEFAULT_CONFIG.rows)
+    parser.add_argument('--cols', type=int, default=DEFAULT_CONFIG.cols)
+    parser.add_argument('--connect-n', type=int, default=DEFAULT_CONFIG.connect_n)
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--positions', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=2023)
+    parser.add_argument('--match', type=int, nargs=2, metavar=('DEPTH1', 'DEPTH2'), default=None,
+                        help='also play a match between these two search depths')
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--playouts', type=int, default=0,
+                        help='also play this many random playouts on each board shape of PLAYOUT_SHAPES')
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.configure_from_args(args)
+
+    game_config = GameConfig(args.rows, args.cols, args.connect_n)
+    positions = benchmark_positions(game_config, args.positions, args.seed)
+    print(f'Move ordering: {len(positions)} positions searched to depth {args.depth} '
+          f'(digest {digest([position.moves for position in positions])})')
+    for name, (nodes, seconds) in benchmark_ordering(positions, args.depth).items():
+        print(f'  {name:<24} {nodes:>10} nodes {seconds:8.2f} s')
+
+    if args.match is not None:
+        result = play_match(tuple(args.match), args.games, game_config, seed=args.seed)
+        print(f'Match: {args.games} games (digest {digest(result.games)}), {result.draws} draws')
+        for depth, wins, seconds in zip(result.depths, result.wins, result.seconds):
+            print(f'  depth {depth:<18} {wins:>10} wins  {seconds:8.2f} s')
+
+    if args.playouts:
+        print(f'Random playouts: {args.playouts} per board shape')
+        for (rows, cols, connect_n), (stats, rate) in benchmark_playouts(args.playouts, args.seed).items():
+            shape = f'{rows}x{cols} connect {connect_n}'
+            print(f'  {shape:<24} {stats.mean_length:>6.1f} moves/game '
+                  f'{stats.draws / stats.games:6.1%} draws {rate:8.0f} playouts/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""This Python module contains the evaluation cache shared by the AI players of Connect N project.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+import os
+import pickle
+from typing import Hashable, Optional
+
+import memory
+
+DEFAULT_MAXSIZE = 200_000
+# The version of the files written by EvaluationCache.save, bumped whenever the keys change so that files saved
+# with other keys are ignored. Unversioned files hold the cell-tuple keys used before engine.evaluation_key.
+FILE_VERSION = 2
+# The bytes an OrderedDict entry and its int score take beyond the key itself
+ENTRY_OVERHEAD = 104
+
+
+class EvaluationCache:
+    """A size-bounded, least-recently-used cache of position evaluations.
+
+    The keys are built by engine.evaluation_key from the board shape, both bitboards, the piece the position is
+    evaluated for and the evaluation weights, and the values are the scores of engine.evaluate (or of
+    AIPlayer.score_position, which agrees with it). Since one cache is shared by every AIPlayer in the process,
+    positions revisited in later moves or later games are scored only once.
+
+    Instance Attributes:
+    - maxsize: the maximum number of evaluations kept; the least recently used entry is evicted beyond this.
+    - max_bytes: if not None, the approximate number of bytes the cached evaluations may take; the least
+      recently used entries are evicted beyond this too (see memory.MemoryBudget).
+    - bytes_used: the approximate number of bytes the cached evaluations take
+    - hits: the number of lookups that found a cached evaluation.
+    - misses: the number of lookups that did not find a cached evaluation.
+
+    Representation Invariants:
+    - self.maxsize > 0
+    - len(self._entries) <= self.maxsize
+    - self.max_bytes is None or self.bytes_used <= self.max_bytes
+    """
+    maxsize: int
+    max_bytes: Optional[int]
+    bytes_used: int
+    hits: int
+    misses: int
+    _entries: OrderedDict[Hashable, int]
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, max_bytes: Optional[int] = None) -> None:
+        """Initialization of EvaluationCache class"""
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of evaluations currently cached"""
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[int]:
+        """Return the cached evaluation for key, or None if key has not been evaluated yet.
+        A successful lookup marks key as the most recently used entry."""
+        score = self._entries.get(key)
+        if score is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return score
+
+    def put(self, key: Hashable, score: int) -> None:
+        """Store the evaluation score for key, evicting the least recently used entries if this cache is full"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        else:
+            self.bytes_used += _entry_size(key)
+        self._entries[key] = score
+        self._evict()
+
+    def memory_usage(self) -> int:
+        """Return the approximate number of bytes the cached evaluations take"""
+        return self.bytes_used
+
+    def set_memory_limit(self, max_bytes: Optional[int]) -> None:
+        """Keep the cached evaluations under max_bytes (or only under maxsize if max_bytes is None), evicting the
+        least recently used entries now if needed"""
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def _evict(self) -> None:
+        """Evict the least recently used entries until this cache is within maxsize and max_bytes"""
+        while self._entries and (len(self._entries) > self.maxsize
+                                 or (self.max_bytes is not None and self.bytes_used > self.max_bytes)):
+            key, _ = self._entries.popitem(last=False)
+            self.bytes_used -= _entry_size(key)
+
+    def items(self) -> list[tuple[Hashable, int]]:
+        """Return the cached (key, evaluation) pairs, least recently used first"""
+        return list(self._entries.items())
+
+    def clear(self) -> None:
+        """Remove every cached evaluation and reset the hit/miss counters"""
+        self._entries.clear()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """Return the size, hit, miss counters and the hit rate of this cache"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'bytes': self.bytes_used,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def save(self, path: str) -> None:
+        """Write the cached evaluations to the file at path so that a later session can warm start from it.
+        The file is replaced atomically so an interrupted save never leaves a truncated cache behind."""
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            pickle.dump((FILE_VERSION, self.items()), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def load(self, path: str) -> int:
+        """Add the evaluations saved at path to this cache and return the number of entries loaded.
+        Return 0 if there is no file at path, or if it was saved with another FILE_VERSION."""
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'rb') as file:
+            saved = pickle.load(file)
+        if not (isinstance(saved, tuple) and len(saved) == 2 and saved[0] == FILE_VERSION):
+            return 0
+        items = saved[1]
+        for key, score in items[-self.maxsize:]:
+            self.put(key, score)
+        return min(len(items), self.maxsize)
+
+
+def _entry_size(key: Hashable) -> int:
+    """Return the approximate number of bytes the entry of key takes in an EvaluationCache"""
+    return memory.tuple_size(key) + ENTRY_OVERHEAD
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['memory', 'collections', 'os', 'pickle', 'typing'],  # the names (strs) of imported modules
+        'allowed-io': ['EvaluationCache.save', 'EvaluationCache.load'],  # the names (strs) of functions that call
+        # print/open/input
+        'max-line-length': 120
+    })
@@ -22,103 +22,186 @@ and Tim Shen.
 
 from __future__ import annotations
 
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, TYPE_CHECKING
 
 import pygame
 
-import player
 import constants
+from config import GameConfig
+
+if TYPE_CHECKING:
+    import player
+
+
+def init_pygame() -> None:
+    """Initialise the pygame subsystems this game uses—display and font—if they are not initialised yet.
+    Unlike pygame.init(), this does not start audio, joystick and the other subsystems the game never uses."""
+    if not pygame.display.get_init():
+        pygame.display.init()
+    if not pygame.font.get_init():
+        pygame.font.init()
+
+
+@lru_cache(maxsize=None)
+def get_font(file_name: Optional[str], size: int) -> pygame.font.Font:
+    """Return the font loaded from file_name (None for pygame's default font) at the given size.
+    Each font is only loaded the first time it is needed and then reused."""
+    return pygame.font.Font(file_name, size)
+
+
+@lru_cache(maxsize=None)
+def get_sys_font(name: str, size: int) -> pygame.font.Font:
+    """Return the system font with the given name and size. Looking up system fonts is slow, so each font is
+    only loaded the first time it is needed and then reused."""
+    return pygame.font.SysFont(name, size)
+
+
+def quit_pygame() -> None:
+    """Uninitialise pygame. The cached fonts are dropped first: they cannot be used once pygame is quit, even
+    after it is initialised again, e.g. for the next Game in the same process."""
+    get_font.cache_clear()
+    get_sys_font.cache_clear()
+    pygame.quit()
+
+
+# The (row, col) step to the neighbour in each slot of Node.neighbours. Opposite directions are in adjacent slots.
+NEIGHBOUR_STEPS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, -1), (-1, -1), (1, 1))
+UPPER_RIGHT_SLOT = 4
+LOWER_RIGHT_SLOT = 7
+# The two opposite neighbour slots making up each line direction
+LINE_SLOTS = {
+    constants.VERTICAL: (0, 1),
+    constants.HORIZ: (2, 3),
+    constants.TOP_RIGHT: (4, 5),
+    constants.TOP_LEFT: (6, 7)
+}
+# The color each fill is drawn in
+FILL_COLORS = {constants.EMPTY: constants.BLACK, constants.PLAYER1: constants.RED, constants.PLAYER2: constants.YELLOW}
+
+
+def opposite_slot(slot: int) -> int:
+    """Return the neighbour slot in the opposite direction of slot"""
+    return slot ^ 1
 
 
 class Board:
     """The game board object made up of nodes
 
     Instance Attributes:
-     - side_length: the number of nodes this Board has along each side (this Board is a square)
-     - nodes: a dictionary containing the (x, y) coordinates of the nodes as keys and the corresponding
-              Node objects as values.
+     - config: the GameConfig of the game played on this Board (its shape, CONNECT_N and square size)
+     - rows: the number of rows of nodes this Board has
+     - cols: the number of columns of nodes this Board has
+     - nodes: the Node objects of this Board in row-major order, i.e. the node at (row, col) is
+              self.nodes[row * self.cols + col] (see Board.node_at).
      - temp_mode: a boolean value indicating whether this Board should be created without the pygame.Surface
-       object as the Board.screen attribute. This is useful for the deepcopy function used for the AIPlayer
-       where deepcopy cannot pickle pygame.Surface objects.
+       object as the Board.screen attribute. This is useful for deepcopy, which cannot pickle pygame.Surface
+       objects.
      - width: an integer representing the width in pixels of this Board.
      - height: an integer representing the height in pixels of this Board.
      - screen: a pygame.Surface object displaying this board with GUI.
      - columns: the dictionary mapping each column to its pixels range on the screen.
 
      Representation Invariants:
-        - self.side_length >= CONNECT_N
+        - max(self.rows, self.cols) >= self.config.connect_n
      """
-    side_length: int
-    nodes: dict[tuple[int, int], Node]
+    config: GameConfig
+    rows: int
+    cols: int
+    nodes: list[Node]
     temp_mode: bool = False
     width: int
     height: int
     screen: pygame.Surface
     columns: dict[int: range]
 
-    def __init__(self, side_length: int, temp_mode: bool = False) -> None:
+    def __init__(self, config: GameConfig, temp_mode: bool = False) -> None:
         """ Initialization of Board class"""
-        self.side_length = side_length
-        self.nodes = {}
+        self.config = config
+        self.rows = config.rows
+        self.cols = config.cols
+        self.nodes = [Node((row, col)) for row in range(self.rows) for col in range(self.cols)]
         self.temp_mode = temp_mode
-        self.width = (self.side_length * constants.SQUARE_SIZE) + (self.side_length + 1) * constants.OFFSET
-        self.height = (self.side_length + 1) * constants.SQUARE_SIZE + ((self.side_length + 1) * constants.OFFSET)
-        self.screen = pygame.display.set_mode((self.width, self.height))
-
-        k = self.side_length
-        for row in range(0, k):  # Add horizontal neighbours
-            for col in range(0, k - 1):
-                self.add_edge((row, col), (row, col + 1))
-
-        for row in range(0, k):  # Add vertical neighbours
-            for col in range(0, k - 1):
-                self.add_edge((col, row), (col + 1, row))
-                # Now add diagonal neighbours
-                if row >= 1:  # and col < k - 1
-                    self.add_edge((row, col), (row - 1, col + 1))  # Add upper-right neighbour
-                if row >= 1 and col >= 1:
-                    self.add_edge((row, col), (row - 1, col - 1))  # Add upper-left neighbour
-                if row < k - 1:  # and col < k - 1
-                    self.add_edge((row, col), (row + 1, col + 1))  # Add bottom-right neighbour
-                if row < k - 1 and col >= 1:
-                    self.add_edge((row, col), (row + 1, col - 1))  # Add bottom-left neighbour
+        self.width = config.width
+        self.height = config.height
+        # set_mode resizes the already opened window instead of opening a new one
+        self.screen = None if self.temp_mode else pygame.display.set_mode((self.width, self.height))
+
+        for node in self.nodes:  # Link every node to its (up to 8) adjacent nodes
+            neighbours = node.neighbours
+            for slot, (d_row, d_col) in enumerate(NEIGHBOUR_STEPS):
+                row, col = node.row + d_row, node.col + d_col
+                if 0 <= row < self.rows and 0 <= col < self.cols:
+                    neighbours[slot] = self.nodes[row * self.cols + col]
         if not self.temp_mode:
             self.screen = self.draw()
-        self.columns = {node.col: node.span for node in self.nodes.values() if node.row == 0}
+        self.columns = {node.col: node.span for node in self.nodes[:self.cols]}
+
+    def __deepcopy__(self, memo: dict) -> Board:
+        """Return a copy of this Board without a screen, e.g. to try out moves off screen.
+        Instead of copying the node graph node by node, the copy builds its own graph and takes over the
+        fills and drawn areas of this Board's nodes."""
+        board_copy = Board(self.config, temp_mode=True)
+        board_copy.temp_mode = self.temp_mode
+        for node, node_copy in zip(self.nodes, board_copy.nodes):
+            node_copy.fill = node.fill
+            node_copy.span = node.span
+            node_copy.rect = None if node.rect is None else node.rect.copy()
+        board_copy.columns = self.columns.copy()
+        memo[id(self)] = board_copy
+        return board_copy
 
     def __repr__(self) -> str:
         """ Representation of Board class"""
         board = ''
-        for coordinate in self.nodes:
-            board += f'\tNode({coordinate}, {self.nodes[coordinate].fill})'
-            if coordinate[1] == self.side_length - 1:
+        for node in self.nodes:
+            board += f'\tNode({node.coordinate}, {node.fill})'
+            if node.col == self.cols - 1:
                 board += '\n'
         return board
 
+    def get_cells(self) -> list[int]:
+        """Return the fill of every node in row-major order, i.e. the fill of node (row, col) is at
+        index row * self.cols + col"""
+        return [node.fill for node in self.nodes]
+
+    def set_cells(self, cells: list[int]) -> None:
+        """Fill every node from cells, a list in the format returned by get_cells. The nodes are not redrawn."""
+        for node, fill in zip(self.nodes, cells):
+            node.fill = fill
+
+    def node_at(self, row: int, col: int) -> Node:
+        """Return the node at (row, col)
+
+        Preconditions:
+        - 0 <= row < self.rows and 0 <= col < self.cols
+        """
+        return self.nodes[row * self.cols + col]
+
     def get_nodes_fill_for_column(self, column: int) -> list[int]:
         """Return the nodes' fill attributes of given column from bottom-up order"""
         nodes_fill_so_far = []
-        for row in range(self.side_length - 1, -1, -1):
-            nodes_fill_so_far.append(self.nodes[(row, column)].fill)
+        for row in range(self.rows - 1, -1, -1):
+            nodes_fill_so_far.append(self.node_at(row, column).fill)
         return nodes_fill_so_far
 
     def get_nodes_fill_for_row(self, row: int) -> list[int]:
         """Return the nodes' fill attributes of given row from left-to-right order"""
         nodes_fill_so_far = []
-        for col in range(self.side_length):
-            nodes_fill_so_far.append(self.nodes[(row, col)].fill)
+        for col in range(self.cols):
+            nodes_fill_so_far.append(self.node_at(row, col).fill)
         return nodes_fill_so_far
 
     def get_valid_locations(self) -> list:
         """Return the possible locations where a piece can be dropped.
         """
         valid_locations = []
-        for col in range(self.side_length):
+        for col in range(self.cols):
             if self.is_valid_column(col):
                 valid_locations.append(col)
         return valid_locations
 
-    def get_positive_diagonal(self, row: int, col: int, visited: set) -> list[int]:
+    def get_positive_diagonal(self, row: int, col: int) -> list[int]:
         """Return the given coordinate (row, col) and its corresponding
         node's diagonal CONNECT_N - 1 nodes' fill attributes in the positive direction i.e.
          the line f(x) = x going from left to right.
@@ -127,19 +210,11 @@ class Board:
         So, the length of the returned list is CONNECT_N
 
         Preconditions:
-        - (row - CONNECT_N + 1, col + CONNECT_N - 1) in self.nodes
+        - 0 <= row - CONNECT_N + 1 and col + CONNECT_N - 1 < self.cols
         """
-        given_node = self.nodes[(row, col)]
-        nodes_fill_so_far = [given_node.fill]
-        visited.add(given_node)
-        for u in given_node.neighbours:
-            if u not in visited and len(visited) < constants.CONNECT_N and given_node.is_direction_neighbour(
-                    u, constants.UPPER_RIGHT, constants.PLAYER2, check_fill=False
-            ):
-                nodes_fill_so_far.extend(self.get_positive_diagonal(u.row, u.col, visited))
-        return nodes_fill_so_far
+        return self._get_line_fills(self.node_at(row, col), UPPER_RIGHT_SLOT)
 
-    def get_negative_diagonal(self, row: int, col: int, visited: set) -> list[int]:
+    def get_negative_diagonal(self, row: int, col: int) -> list[int]:
         """Return the given coordinate (row, col)'s corresponding
         node and its diagonal CONNECT_N - 1 nodes' fill attributes in the negative direction i.e.
          the line f(x) = -x going from left to right.
@@ -148,53 +223,43 @@ class Board:
         So, the length of the returned list is CONNECT_N
 
         Preconditions:
-        - (row + CONNECT_N - 1, col + CONNECT_N - 1) in self.nodes
+        - row + CONNECT_N - 1 < self.rows and col + CONNECT_N - 1 < self.cols
         """
-        given_node = self.nodes[(row, col)]
-        nodes_fill_so_far = [given_node.fill]
-        visited.add(given_node)
-        for u in given_node.neighbours:
-            if u not in visited and len(visited) < constants.CONNECT_N and given_node.is_direction_neighbour(
-                    u, constants.LOWER_RIGHT, constants.PLAYER2, check_fill=False
-            ):
-                nodes_fill_so_far.extend(self.get_negative_diagonal(u.row, u.col, visited))
+        return self._get_line_fills(self.node_at(row, col), LOWER_RIGHT_SLOT)
+
+    def _get_line_fills(self, node: Optional[Node], slot: int) -> list[int]:
+        """Return the fills of node and the following nodes in the neighbour slot, up to CONNECT_N nodes"""
+        nodes_fill_so_far = []
+        while node is not None and len(nodes_fill_so_far) < self.config.connect_n:
+            nodes_fill_so_far.append(node.fill)
+            node = node.neighbours[slot]
         return nodes_fill_so_far
 
-    def is_valid_column(self, col: int) -> bool:
+    def is_valid_column(self, col: int | None) -> bool:
         """Return whether col still has empty slots"""
-        coord = (0, col)
-        if coord in self.nodes:
-            return self.nodes[coord].fill == constants.EMPTY
+        if col is not None and 0 <= col < self.cols:
+            return self.nodes[col].fill == constants.EMPTY
         return False
 
     def get_next_open_row(self, col: int) -> int | None:
         """Return the next available row, or None if there are no more rows available"""
-        for row in range(self.side_length - 1, -1, -1):
-            if self.nodes[(row, col)].is_empty():
+        for row in range(self.rows - 1, -1, -1):
+            if self.node_at(row, col).is_empty():
                 return row
         return None
 
-    def add_node(self, coordinate: tuple[int, int]) -> Node:
-        """Add a new node with the given coordinate to this board and return it"""
-        node = Node(coordinate)
-        self.nodes[coordinate] = node
-        return node
-
     def add_edge(self, coord1: tuple[int, int], coord2: tuple[int, int]) -> None:
-        """Add an edge between the two nodes with the given coordinates—coord1 and coord2.
-        If a given coordinate does not correspond to a node on this board, then first create a new node
-        for thatt coordinate
+        """Add an edge between the two adjacent nodes with the given coordinates—coord1 and coord2—by filling
+        the neighbour slot of each node in the direction of the other.
 
         Preconditions:
             - coord1 != coord2
+            - coord1 and coord2 are adjacent (including diagonally) coordinates on this board
         """
-        if coord1 not in self.nodes:
-            self.add_node(coord1)
-        if coord2 not in self.nodes:
-            self.add_node(coord2)
-        node1, node2 = self.nodes[coord1], self.nodes[coord2]
-        node1.neighbours.add(node2)
-        node2.neighbours.add(node1)
+        node1, node2 = self.node_at(*coord1), self.node_at(*coord2)
+        slot = NEIGHBOUR_STEPS.index((coord2[0] - coord1[0], coord2[1] - coord1[1]))
+        node1.neighbours[slot] = node2
+        node2.neighbours[opposite_slot(slot)] = node1
 
     def get_neighbours_dict(self) -> dict[tuple[int, int], set[tuple[int, int]]]:
         """Return a dictionary containing the adjacency relationships for every node on this board.
@@ -206,8 +271,9 @@ class Board:
         """
         adjacencies_so_far = {}
 
-        for address, node in self.nodes.items():
-            adjacencies_so_far[address] = {neighbour.coordinate for neighbour in node.neighbours}
+        for node in self.nodes:
+            adjacencies_so_far[node.coordinate] = {neighbour.coordinate for neighbour in node.neighbours
+                                                   if neighbour is not None}
 
         return adjacencies_so_far
 
@@ -228,16 +294,16 @@ class Board:
         """Draw this board on Pygame window"""
 
         screen = self.screen
-        rect = pygame.Rect((0, constants.SQUARE_SIZE), (self.width, self.height - constants.SQUARE_SIZE))
-        radius = constants.RAD
+        square_size = self.config.square_size
+        rect = pygame.Rect((0, square_size), (self.width, self.height - square_size))
+        radius = self.config.radius
 
         pygame.draw.rect(screen, constants.BLUE, rect)
-        x_position, y_position = radius + constants.OFFSET, constants.SQUARE_SIZE + radius + constants.OFFSET
-        for coord in self.nodes:
-            _, col = coord
+        x_position, y_position = radius + constants.OFFSET, square_size + radius + constants.OFFSET
+        for node in self.nodes:
             center = (x_position, y_position)
-            self.nodes[coord].draw(screen, center, radius)
-            if col == self.side_length - 1:
+            node.draw(screen, center, radius, FILL_COLORS[node.fill])
+            if node.col == self.cols - 1:
                 y_position += 2 * radius + constants.OFFSET
                 x_position = radius + constants.OFFSET
             else:
@@ -271,7 +337,7 @@ class Button:
         self.y_pos = pos_y
         self.rect = None
         self.screen = screen
-        self.button_text_font = pygame.font.Font("freesansbold.ttf", 18)
+        self.button_text_font = get_font("freesansbold.ttf", 18)
         self.draw()
 
     def draw(self) -> None:
@@ -302,14 +368,13 @@ class Node:
     """A node that represents a coordinate on the game board
 
     Instance Attributes:
-    - coordinate: the (x, y) coordinate of this Node
-    - neighbours: the nodes connected to this Node. The neighbour nodes are its immediately adjacent nodes
+    - neighbours: the nodes connected to this Node, one slot per direction (see NEIGHBOUR_STEPS); a slot is None
+      when there is no node in that direction. The neighbour nodes are its immediately adjacent nodes
       vertically and diagonally, regardless of their Node.fill attribute—this is useful for the AIPlayer
       to evaluate sequences of four nodes recursively and determine where to move.
     - fill: the fill of this node that is either PLAYER1, PLAYER2, or EMPTY
     - row: this Node's x-coordinate used for concise, easy access
     - col: this Node's y-coordinate used for consise, easy access
-    - radius: an integer representing the radius of this Node's circle
     - span: a range representing the span of this Node from its left-most side to the right-most side. This is
       useful for determining which column the user selected. When this Node is not yet drawn,
       its span is defaulted to range(1)
@@ -317,28 +382,31 @@ class Node:
       assigned to None
 
     Representation Invariants:
+    - len(self.neighbours) == len(NEIGHBOUR_STEPS)
     - self not in self.neighbours
-    - all(self in u.neighbours for u in self.neighbours)
+    - all(u is None or u.neighbours[opposite_slot(i)] is self for i, u in enumerate(self.neighbours))
     """
-    coordinate: tuple[int, int]
-    neighbours: set[Node]
+    __slots__ = ('neighbours', 'row', 'col', 'fill', 'span', 'rect')
+    neighbours: list[Optional[Node]]
     row: int
     col: int
-    fill: int = constants.EMPTY
-    radius: int
+    fill: int
     span: range
     rect: Optional[pygame.Rect]
 
     def __init__(self, coordinate: tuple[int, int]) -> None:
         """ Initialization of Node class"""
-        self.neighbours = set()
-        self.coordinate = coordinate
+        self.neighbours = [None] * len(NEIGHBOUR_STEPS)
         self.fill = constants.EMPTY
-        self.row = coordinate[0]
-        self.col = coordinate[1]
+        self.row, self.col = coordinate
         self.span = range(2)  # placeholder value as this Node's span will be set when the Board is drawn
         self.rect = None
 
+    @property
+    def coordinate(self) -> tuple[int, int]:
+        """The (x, y) coordinate of this Node"""
+        return self.row, self.col
+
     def draw(self, screen: pygame.Surface, center: tuple[int, int], radius: int,
              color: tuple = constants.BLACK) -> None:
         """Draw this node on the pygame screen"""
@@ -353,52 +421,20 @@ class Node:
         """ Representation of Node class"""
         return f'({self.coordinate}, {self.fill})'
 
-    def find_sequence(self, player_i: player.Player, direction: str, visited: set) -> list[tuple[int, int]]:
-        """Find and return the sequences of the given player's nodes in the given direction
+    def find_sequence(self, player_i: player.Player, direction: str) -> list[tuple[int, int]]:
+        """Find and return the sequences of the given player's nodes in the given direction (one of VERTICAL,
+        HORIZ, TOP_RIGHT and TOP_LEFT) that goes through this node
 
         Note that the returned sequence does not need to be in order since we only care about its length
         """
         sequence = [self.coordinate]
-        visited.add(self)
-        for u in self.neighbours:
-            if u not in visited and self.is_direction_neighbour(u, direction, player_i.name):
-                u_sequence = u.find_sequence(player_i, direction, visited)
-                sequence.extend(u_sequence)
+        for slot in LINE_SLOTS[direction]:
+            node = self.neighbours[slot]
+            while node is not None and node.fill == player_i.name:
+                sequence.append(node.coordinate)
+                node = node.neighbours[slot]
         return sequence
 
-    def is_direction_neighbour(self, node: Node, direction: str, player_name: int, check_fill: bool = True) -> bool:
-        """Return whether node is a neighbour of this Node in the given direction for player
-
-        if check_fill=False, then this method will not restrict the neighbour node's fill to player_name;
-        additionally, more specific directions will be taken into account"""
-        if check_fill is True:
-            if node.fill == player_name:
-                if node.col == self.col and direction == constants.VERTICAL:
-                    return True
-                elif node.row == self.row and direction == constants.HORIZ:
-                    return True
-                elif ((node.col > self.col and node.row < self.row) or (
-                        node.col < self.col and node.row > self.row)) and direction == constants.TOP_RIGHT:
-                    return True
-                elif ((node.col < self.col and node.row < self.row) or (
-                        node.col > self.col and node.row > self.row)) and direction == constants.TOP_LEFT:
-                    return True
-            return False
-        else:
-            if node.col == self.col and direction == constants.VERTICAL:
-                return True
-            elif node.row == self.row and direction == constants.HORIZ:
-                return True
-            elif (node.col > self.col and node.row < self.row) and direction == constants.UPPER_RIGHT:
-                return True
-            elif node.col < self.col and node.row > self.row and direction == constants.LOWER_LEFT:
-                return True
-            elif (node.col < self.col and node.row < self.row) and direction == constants.TOP_LEFT:
-                return True
-            elif node.col > self.col and node.row > self.row and direction == constants.LOWER_RIGHT:
-                return True
-        return False
-
 
 class InputBox:
     """The InputBox object.
@@ -424,7 +460,7 @@ class InputBox:
         self.color = constants.LIGHT_BLUE
         self.label_text = label_text
         self.text = ''
-        self.font = pygame.font.Font(None, height)
+        self.font = get_font(None, height)
         self.txt_surface = self.font.render(self.text, True, self.color)
         self.active = False
 
@@ -462,7 +498,8 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['player', 'constants', 'pygame'],  # the names (strs) of imported modules
+        'extra-imports': ['player', 'constants', 'config', 'pygame', 'functools',
+                          'typing'],  # the names (strs) of imported modules
         'allowed-io': [],  # the names (strs) of functions that call print/open/input
         'disable': ['R1710', 'E1101', 'R0913'],
         'max-line-length': 120
@@ -0,0 +1,127 @@
+"""This Python module contains the per-game configuration of Connect N project.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from functools import lru_cache
+
+import constants
+
+# The (row, col) step of each window direction; rows are counted from the top of the board
+DIRECTION_STEPS = {
+    constants.HORIZ: (0, 1),
+    constants.VERTICAL: (1, 0),
+    constants.TOP_RIGHT: (-1, 1),
+    constants.TOP_LEFT: (1, 1)
+}
+
+
+@dataclass(frozen=True)
+class GameConfig:
+    """The immutable settings of one game. Every Board, Player and AIPlayer of a game shares its GameConfig,
+    so games with different settings can safely run side by side in the same process.
+
+    Instance Attributes:
+    - rows: the number of rows of the board
+    - cols: the number of columns of the board
+    - connect_n: the length of the sequence needed to win
+    - square_size: the size in pixels of the square around each node when the board is drawn
+
+    Representation Invariants:
+    - self.rows >= 1 and self.cols >= 1
+    - 1 <= self.connect_n <= max(self.rows, self.cols)
+    - self.square_size > 0
+    """
+    rows: int
+    cols: int
+    connect_n: int = constants.CONNECT_N
+    square_size: int = constants.SQUARE_SIZE
+
+    def __post_init__(self) -> None:
+        """Raise ValueError if this configuration breaks a representation invariant"""
+        if self.rows < 1 or self.cols < 1:
+            raise ValueError(f'A board needs at least one row and one column, not {self.rows} x {self.cols}')
+        if not 1 <= self.connect_n <= max(self.rows, self.cols):
+            raise ValueError(f'CONNECT_N = {self.connect_n} does not fit on a {self.rows} x {self.cols} board')
+        if self.square_size <= 0:
+            raise ValueError('square_size must be positive')
+
+    @classmethod
+    def square(cls, side_length: int, connect_n: int = constants.CONNECT_N) -> GameConfig:
+        """Return the configuration of a side_length x side_length board"""
+        return cls(side_length, side_length, connect_n)
+
+    @property
+    def radius(self) -> int:
+        """The radius in pixels of a drawn node"""
+        return self.square_size // 2
+
+    @property
+    def width(self) -> int:
+        """The width in pixels of the drawn board"""
+        return self.cols * self.square_size + (self.cols + 1) * constants.OFFSET
+
+    @property
+    def height(self) -> int:
+        """The height in pixels of the drawn board, including the header bar"""
+        return (self.rows + 1) * self.square_size + (self.rows + 1) * constants.OFFSET
+
+    def fit_to_screen(self, max_width: int, max_height: int) -> GameConfig:
+        """Return a copy of this configuration whose square_size is shrunk (in steps of 5 pixels) until the
+        drawn board fits in max_width x max_height pixels"""
+        fitted = self
+        while (fitted.width > max_width or fitted.height > max_height) and fitted.square_size > 5:
+            fitted = replace(fitted, square_size=fitted.square_size - 5)
+        return fitted
+
+    def windows(self, direction: str) -> tuple[tuple[int, ...], ...]:
+        """Return every window of connect_n consecutive cells in direction (one of HORIZ, VERTICAL, TOP_RIGHT,
+        TOP_LEFT). Each window is a tuple of cell indices row * cols + col. The windows are computed once per
+        board shape and then reused."""
+        return get_windows(self.rows, self.cols, self.connect_n, direction)
+
+
+@lru_cache(maxsize=constants.SHAPE_CACHE_SIZE)
+def get_windows(rows: int, cols: int, connect_n: int, direction: str) -> tuple[tuple[int, ...], ...]:
+    """Return every window of connect_n consecutive cells in direction on a rows x cols board
+    (see GameConfig.windows)"""
+    d_row, d_col = DIRECTION_STEPS[direction]
+    windows = []
+    for row in range(rows):
+        for col in range(cols):
+            end_row, end_col = row + d_row * (connect_n - 1), col + d_col * (connect_n - 1)
+            if 0 <= end_row < rows and 0 <= end_col < cols:
+                windows.append(tuple((row + d_row * i) * cols + col + d_col * i for i in range(connect_n)))
+    return tuple(windows)
+
+
+DEFAULT_CONFIG = GameConfig(6, 7)
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['constants', 'dataclasses', 'functools'],  # the names (strs) of imported modules
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
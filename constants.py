@@ -41,6 +41,9 @@ BLUE = (0, 0, 255)
 LIGHT_BLUE = (173, 216, 230)
 RAD = SQUARE_SIZE // 2
 
+# The number of board shapes whose precomputed tables (window masks, score tables, ...) are kept in memory
+SHAPE_CACHE_SIZE = 128
+
 
 
 if __name__ == '__main__':
@@ -0,0 +1,464 @@
+"""This Python module contains the headless search engine of Connect N project.
+
+Unlike components.Board, the positions in this module are plain bitboards that do not depend on pygame,
+so they can be created, copied and searched in bulk (e.g. by analysis.py) without a display.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Sequence, TYPE_CHECKING
+
+import constants
+from config import GameConfig
+import ordering
+import profiling
+from weights import DEFAULT_WEIGHTS, EvalWeights, NUM_WEIGHTS
+
+if TYPE_CHECKING:
+    import cache
+
+WIN_SCORE = 1_000_000
+MOVE_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def other_player(player: int) -> int:
+    """Return the opponent of player
+
+    Preconditions:
+    - player in {PLAYER1, PLAYER2}
+    """
+    return constants.PLAYER2 if player == constants.PLAYER1 else constants.PLAYER1
+
+
+@lru_cache(maxsize=constants.SHAPE_CACHE_SIZE)
+def window_masks(rows: int, cols: int, connect_n: int) -> tuple[int, ...]:
+    """Return the bitmask of every window of connect_n consecutive cells (vertically, horizontally and
+    diagonally) on a rows x cols board, using the bit layout of Position."""
+    height = rows + 1
+    masks = []
+    for col in range(cols):
+        for row in range(rows):
+            for d_col, d_row in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_col, end_row = col + d_col * (connect_n - 1), row + d_row * (connect_n - 1)
+                if end_col < cols and 0 <= end_row < rows:
+                    mask = 0
+                    for i in range(connect_n):
+                        mask |= 1 << ((col + d_col * i) * height + row + d_row * i)
+                    masks.append(mask)
+    return tuple(masks)
+
+
+@lru_cache(maxsize=constants.SHAPE_CACHE_SIZE)
+def column_mask(rows: int, col: int) -> int:
+    """Return the bitmask of every playable cell of col on a board with the given number of rows"""
+    return ((1 << rows) - 1) << (col * (rows + 1))
+
+
+class Position:
+    """A Connect N position stored as one bitboard per player.
+
+    Bit (col * (rows + 1) + row) is the cell in column col at height row, counting rows from the bottom.
+    Each column has one extra, always-empty bit on top so that lines never wrap from one column into the next.
+
+    Instance Attributes:
+    - config: the GameConfig of this position's game (only its rows, cols and connect_n are used)
+    - rows: the number of rows of this position's board
+    - cols: the number of columns of this position's board
+    - connect_n: the length of the sequence needed to win
+    - bitboards: bitboards[PLAYER1] and bitboards[PLAYER2] are the cells filled by each player
+      (bitboards[EMPTY] is unused and always 0)
+    - heights: heights[col] is the number of pieces already dropped into col
+    - turn: the player who should move next
+    - moves: the columns played so far, in order
+
+    Representation Invariants:
+    - self.rows >= 1 and self.cols >= 1 and self.connect_n >= 1
+    - all(0 <= h <= self.rows for h in self.heights)
+    - self.bitboards[PLAYER1] & self.bitboards[PLAYER2] == 0
+    """
+    config: GameConfig
+    rows: int
+    cols: int
+    connect_n: int
+    bitboards: list[int]
+    heights: list[int]
+    turn: int
+    moves: list[int]
+
+    def __init__(self, config: GameConfig) -> None:
+        """Initialization of an empty Position"""
+        self.config = config
+        self.rows = config.rows
+        self.cols = config.cols
+        self.connect_n = config.connect_n
+        self.bitboards = [0, 0, 0]
+        self.heights = [0] * config.cols
+        self.turn = constants.PLAYER1
+        self.moves = []
+
+    @classmethod
+    def from_moves(cls, moves: str | Sequence[int], config: GameConfig) -> Position:
+        """Return the position reached by playing moves from the empty board.
+
+        moves is either a sequence of column indices or a string with one character per move, where each
+        character is a column index written in base 36 ('0'-'9' then 'a'-'z').
+
+        Raise ValueError if a move is not playable.
+        """
+        position = cls(config)
+        for move in parse_moves(moves):
+            if not position.can_play(move):
+                raise ValueError(f'Column {move} is not playable after moves {position.moves}')
+            position.play(move)
+        return position
+
+    @classmethod
+    def from_grid(cls, grid: Sequence[Sequence[int]], connect_n: int) -> Position:
+        """Return the position represented by grid, a list of rows from top to bottom holding the fill
+        (EMPTY, PLAYER1 or PLAYER2) of every cell, the same layout as components.Board.
+
+        The player to move is PLAYER1 if both players have the same number of pieces and PLAYER2 otherwise.
+        Since the move order cannot be recovered from a grid, the returned position has no move history.
+
+        Raise ValueError if grid is not a position that can be reached by dropping pieces.
+        """
+        rows, cols = len(grid), len(grid[0])
+        position = cls(GameConfig(rows, cols, connect_n))
+        for col in range(cols):
+            for row in range(rows - 1, -1, -1):
+                fill = grid[row][col]
+                if fill == constants.EMPTY:
+                    if any(grid[r][col] != constants.EMPTY for r in range(row)):
+                        raise ValueError(f'Column {col} has a floating piece')
+                    break
+                if fill not in (constants.PLAYER1, constants.PLAYER2):
+                    raise ValueError(f'Unknown fill {fill!r} in column {col}')
+                position.bitboards[fill] |= 1 << position.bit(position.heights[col], col)
+                position.heights[col] += 1
+        count1 = position.bitboards[constants.PLAYER1].bit_count()
+        count2 = position.bitboards[constants.PLAYER2].bit_count()
+        if count1 - count2 not in (0, 1):
+            raise ValueError('The players do not have a valid number of pieces')
+        position.turn = constants.PLAYER1 if count1 == count2 else constants.PLAYER2
+        return position
+
+    @classmethod
+    def from_cells(cls, cells: Sequence[int], config: GameConfig) -> Position:
+        """Return a position with the pieces of cells, the fills of a board of shape config listed row by row
+        from the top (see components.Board.get_cells), without checking that a game can reach it.
+
+        Only the bitboards are set, which is enough for evaluation_key and to_grid.
+        """
+        position = cls(config)
+        for i, fill in enumerate(cells):
+            if fill != constants.EMPTY:
+                row, col = divmod(i, position.cols)
+                position.bitboards[fill] |= 1 << position.bit(position.rows - 1 - row, col)
+        return position
+
+    def copy(self) -> Position:
+        """Return an independent copy of this position"""
+        position = Position(self.config)
+        position.bitboards = self.bitboards.copy()
+        position.heights = self.heights.copy()
+        position.turn = self.turn
+        position.moves = self.moves.copy()
+        return position
+
+    def bit(self, row: int, col: int) -> int:
+        """Return the bit index of the cell at height row (from the bottom) in col"""
+        return col * (self.rows + 1) + row
+
+    def can_play(self, col: int) -> bool:
+        """Return whether col is on the board and still has empty cells"""
+        return 0 <= col < self.cols and self.heights[col] < self.rows
+
+    def valid_moves(self) -> list[int]:
+        """Return the columns that still have empty cells, from left to right"""
+        return [col for col in range(self.cols) if self.heights[col] < self.rows]
+
+    def play(self, col: int) -> None:
+        """Drop a piece of self.turn into col and pass the turn to the other player
+
+        Preconditions:
+        - self.can_play(col)
+        """
+        self.bitboards[self.turn] |= 1 << self.bit(self.heights[col], col)
+        self.heights[col] += 1
+        self.moves.append(col)
+        self.turn = other_player(self.turn)
+
+    def undo(self) -> None:
+        """Take back the last move played
+
+        Preconditions:
+        - self.moves != []
+        """
+        col = self.moves.pop()
+        self.turn = other_player(self.turn)
+        self.heights[col] -= 1
+        self.bitboards[self.turn] &= ~(1 << self.bit(self.heights[col], col))
+
+    def is_full(self) -> bool:
+        """Return whether every cell of this position is filled"""
+        return all(height == self.rows for height in self.heights)
+
+    def has_won(self, player: int) -> bool:
+        """Return whether player has a line of at least connect_n pieces"""
+        board = self.bitboards[player]
+        height = self.rows + 1
+        for shift in (1, height, height - 1, height + 1):
+            line = board
+            for i in range(1, self.connect_n):
+                line &= board >> (i * shift)
+                if not line:
+                    break
+            if line:
+                return True
+        return False
+
+    def is_terminal(self) -> bool:
+        """Return whether the game has ended in this position, i.e. the last mover won or the board is full"""
+        return self.has_won(other_player(self.turn)) or self.is_full()
+
+    def key(self) -> tuple[int, int]:
+        """Return a hashable key that identifies this position on its board shape"""
+        return self.bitboards[constants.PLAYER1], self.bitboards[constants.PLAYER2]
+
+    def to_grid(self) -> list[list[int]]:
+        """Return this position as a list of rows from top to bottom, the inverse of Position.from_grid"""
+        grid = []
+        for row in range(self.rows - 1, -1, -1):
+            grid_row = []
+            for col in range(self.cols):
+                mask = 1 << self.bit(row, col)
+                if self.bitboards[constants.PLAYER1] & mask:
+                    grid_row.append(constants.PLAYER1)
+                elif self.bitboards[constants.PLAYER2] & mask:
+                    grid_row.append(constants.PLAYER2)
+                else:
+                    grid_row.append(constants.EMPTY)
+            grid.append(grid_row)
+        return grid
+
+
+def parse_moves(moves: str | Sequence[int]) -> list[int]:
+    """Return moves as a list of column indices (see Position.from_moves for the accepted formats)
+
+    Raise ValueError if moves contains a character that is not a base-36 digit.
+    """
+    if isinstance(moves, str):
+        columns = []
+        for char in moves.strip().lower():
+            if char not in MOVE_DIGITS:
+                raise ValueError(f'{char!r} is not a column in move string {moves!r}')
+            columns.append(MOVE_DIGITS.index(char))
+        return columns
+    return [int(move) for move in moves]
+
+
+def format_moves(moves: Sequence[int]) -> str:
+    """Return moves as a move string, the inverse of parse_moves"""
+    return ''.join(MOVE_DIGITS[move] for move in moves)
+
+
+@lru_cache(maxsize=None)
+def window_classes(connect_n: int) -> tuple[tuple[tuple[int, int], ...], ...]:
+    """Return the table classes where classes[own][opp] is the pair (own class, opponent class) of a window
+    holding own pieces of the evaluated player and opp pieces of the opponent. The classes index
+    EvalWeights.own and EvalWeights.opp and follow the rules of player.AIPlayer.evaluate_window."""
+    n = connect_n
+    classes = []
+    for own in range(n + 1):
+        row = []
+        for opp in range(n + 1):
+            empty = n - own - opp
+            if own == n:
+                own_class = 0
+            elif own == n - 1 and empty == 1:
+                own_class = 1
+            elif own == n - 2 and empty == 2:
+                own_class = 2
+            else:
+                own_class = 3
+
+            if opp == n - 1 and empty == 1:
+                opp_class = 0
+            elif opp == n - 2 and empty == 2:
+                opp_class = 1
+            elif opp == n - 3 and empty == 3:
+                opp_class = 2
+            else:
+                opp_class = 3
+            row.append((own_class, opp_class))
+        classes.append(tuple(row))
+    return tuple(classes)
+
+
+@lru_cache(maxsize=constants.SHAPE_CACHE_SIZE)
+def window_scores(connect_n: int, weights: EvalWeights) -> tuple[tuple[int, ...], ...]:
+    """Return the table scores where scores[own][opp] is the score under weights of a window holding own pieces
+    of the evaluated player and opp pieces of the opponent"""
+    return tuple(tuple(weights.own[own_class] + weights.opp[opp_class] for own_class, opp_class in row)
+                 for row in window_classes(connect_n))
+
+
+def evaluate(position: Position, piece: int, weights: EvalWeights = DEFAULT_WEIGHTS) -> int:
+    """Return the heuristic score of position for piece, using the same window rules as
+    player.AIPlayer.evaluate_window plus weights.center points for each of piece's pieces in the center column."""
+    own_board = position.bitboards[piece]
+    opp_board = position.bitboards[other_player(piece)]
+    scores = window_scores(position.connect_n, weights)
+    score = (own_board & column_mask(position.rows, position.cols // 2)).bit_count() * weights.center
+    for mask in window_masks(position.rows, position.cols, position.connect_n):
+        score += scores[(own_board & mask).bit_count()][(opp_board & mask).bit_count()]
+    return score
+
+
+def evaluation_key(position: Position, piece: int,
+                   weights: EvalWeights = DEFAULT_WEIGHTS) -> tuple[tuple[int, ...], int, EvalWeights]:
+    """Return the key of the evaluation of position for piece with weights in a cache.EvaluationCache:
+    the board shape and both bitboards, piece and weights"""
+    return (position.rows, position.cols, position.connect_n) + position.key(), piece, weights
+
+
+def eval_features(position: Position, piece: int) -> list[int]:
+    """Return the features of position for piece, i.e. the number of windows in each own class, the number of
+    windows in each opponent class and the number of piece's pieces in the center column, so that
+    evaluate(position, piece, weights) == the dot product of weights.as_vector() and these features."""
+    own_board = position.bitboards[piece]
+    opp_board = position.bitboards[other_player(piece)]
+    classes = window_classes(position.connect_n)
+    features = [0] * NUM_WEIGHTS
+    for mask in window_masks(position.rows, position.cols, position.connect_n):
+        own_class, opp_class = classes[(own_board & mask).bit_count()][(opp_board & mask).bit_count()]
+        features[own_class] += 1
+        features[4 + opp_class] += 1
+    features[8] = (own_board & column_mask(position.rows, position.cols // 2)).bit_count()
+    return features
+
+
+@dataclass
+class SearchResult:
+    """The outcome of a search.
+
+    Instance Attributes:
+    - best_move: the column to play, or None if the position is already terminal
+    - score: the score of best_move from the point of view of the player to move
+    - pv: the principal variation, i.e. the expected line of play starting with best_move
+    - nodes: the number of positions visited by the search
+    """
+    best_move: int | None
+    score: int
+    pv: list[int]
+    nodes: int
+
+
+class Searcher:
+    """A depth-limited alpha-beta (negamax) searcher over Position objects.
+
+    Leaf positions are scored with evaluate for the player to move at the root, so a depth-1 search picks the
+    same move as player.AIPlayer does. Wins are scored WIN_SCORE minus the number of plies needed, so faster wins
+    (and slower losses) are preferred.
+
+    Instance Attributes:
+    - depth: the number of plies searched from the root
+    - nodes: the number of positions visited by the last search
+    - orderer: the MoveOrderer deciding in which order moves are searched; it keeps its history table
+      between searches, so reusing a Searcher for the moves of one game orders moves better
+    - weights: the evaluation weights used to score leaf positions
+    - cache: if not None, the leaf evaluations are looked up in (and stored into) this cache, keyed by
+      evaluation_key, so leaves revisited in later searches are only evaluated once
+    """
+    depth: int
+    nodes: int
+    orderer: ordering.MoveOrderer
+    weights: EvalWeights
+    cache: Optional[cache.EvaluationCache]
+
+    def __init__(self, depth: int = 4, orderer: ordering.MoveOrderer | None = None,
+                 weights: EvalWeights = DEFAULT_WEIGHTS, cache: Optional[cache.EvaluationCache] = None) -> None:
+        """Initialization of Searcher class"""
+        self.depth = depth
+        self.nodes = 0
+        self.orderer = ordering.MoveOrderer() if orderer is None else orderer
+        self.weights = weights
+        self.cache = cache
+
+    @profiling.profiled('search')
+    def search(self, position: Position, depth: int | None = None) -> SearchResult:
+        """Search position to the given depth (self.depth by default) and return the result.
+        position is left unchanged."""
+        self.nodes = 0
+        self.orderer.new_search()
+        depth = self.depth if depth is None else depth
+        score, pv = self._negamax(position, depth, -WIN_SCORE - 1, WIN_SCORE + 1, position.turn, 0)
+        return SearchResult(pv[0] if pv else None, score, pv, self.nodes)
+
+    def _evaluate(self, position: Position, piece: int) -> int:
+        """Return evaluate(position, piece, self.weights), through self.cache if there is one"""
+        if self.cache is None:
+            return evaluate(position, piece, self.weights)
+        key = evaluation_key(position, piece, self.weights)
+        score = self.cache.get(key)
+        if score is None:
+            score = evaluate(position, piece, self.weights)
+            self.cache.put(key, score)
+        return score
+
+    def _negamax(self, position: Position, depth: int, alpha: int, beta: int, root: int,
+                 ply: int) -> tuple[int, list[int]]:
+        """Return the score of position for the player to move together with the principal variation"""
+        self.nodes += 1
+        if position.has_won(other_player(position.turn)):
+            return ply - WIN_SCORE, []
+        if position.is_full():
+            return 0, []
+        if depth == 0:
+            score = self._evaluate(position, root)
+            return (score if position.turn == root else -score), []
+
+        best_score, best_pv = -WIN_SCORE - 1, []
+        for col in self.orderer.order(position, ply):
+            position.play(col)
+            score, child_pv = self._negamax(position, depth - 1, -beta, -alpha, root, ply + 1)
+            position.undo()
+            score = -score
+            if score > best_score:
+                best_score, best_pv = score, [col] + child_pv
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                self.orderer.record_cutoff(position, col, depth, ply)
+                break
+        return best_score, best_pv
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['cache', 'constants', 'config', 'ordering', 'profiling', 'weights', 'dataclasses',
+                          'functools', 'typing'],  # the names (strs) of imported modules
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
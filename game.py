@@ -21,13 +21,23 @@ and Tim Shen.
 """
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import os
+import random
 from typing import Optional
 
 import pygame
 
 import components
 import constants
+from config import GameConfig
+import engine
+import latency
+import profiling
 from player import Player, EasyAIPlayer, AIPlayer
+import render
+import snapshot
+from weights import DEFAULT_WEIGHTS, EvalWeights
 
 
 class Game:
@@ -43,6 +53,19 @@ class Game:
     winner: initially set to 'NO ONE', the winner of this Game will become the player that first
             obtains a vertical, horizontal, or diagonal sequence of length CONNECT_N
     ai_mode: a boolean value indicating whether this Game is played with any AIPlayer.
+    ai_weights: the evaluation weights of the Hard Level AIPlayer.
+    seed: the seed of the AI players' random number generator, so that the same human moves always get the
+          same replies, or None for unseeded (non-reproducible) AI players. A seeded Hard Level AIPlayer searches
+          at the fixed latency.DEFAULT_LEVEL instead of adapting its level to move_target, since the adapted
+          level depends on the load of the machine.
+    move_target: the 95th percentile move time, in seconds, the unseeded Hard Level AIPlayer adapts its search to.
+    save_path: if not None, the game is saved to this file (see snapshot.py) when the window is closed before
+               the game ends, or when the S key is pressed.
+    save_cache: whether the saved game includes the AI's cached evaluations of positions on this board, so a
+                resumed game does not evaluate them again.
+    renderer: the Renderer animating the moves on the board while the game runs, or None before it runs.
+    ai_move: the move the AIPlayer is choosing in the background while the game runs, or None when it is not
+             thinking. The AI tries its moves on self.board, so the board must not be read until it is done.
     """
     players: list[Player]
     game_over: bool
@@ -52,96 +75,154 @@ class Game:
     player2: Optional[Player]
     winner: int | str
     ai_mode: bool
-    winning_font: pygame.font.Font
-
-    def __init__(self, board: components.Board) -> None:
+    ai_weights: EvalWeights
+    seed: Optional[int]
+    move_target: float
+    save_path: Optional[str]
+    save_cache: bool
+    renderer: Optional[render.Renderer]
+    ai_move: Optional[Future]
+
+    def __init__(self, board: components.Board, ai_weights: EvalWeights = DEFAULT_WEIGHTS,
+                 seed: Optional[int] = None, move_target: float = latency.DEFAULT_MOVE_TARGET,
+                 save_path: Optional[str] = None, save_cache: bool = False) -> None:
         """Initialization of Game class"""
         self.game_over = False
         self.turn = constants.PLAYER1
         self.board = board
-        self.player1 = Player(constants.PLAYER1)
+        self.player1 = Player(constants.PLAYER1, board.config)
         self.player2 = None
         self.winner = 'NO ONE'
         self.ai_mode = False
-        pygame.init()
-        self.winning_font = pygame.font.SysFont('monospace', int(constants.SQUARE_SIZE // 3))
-        pygame.init()
+        self.ai_weights = ai_weights
+        self.seed = seed
+        self.move_target = move_target
+        self.save_path = save_path
+        self.save_cache = save_cache
+        self.renderer = None
+        self.ai_move = None
+        components.init_pygame()
+
+    @property
+    def winning_font(self) -> pygame.font.Font:
+        """The font of the winning message. It is only loaded when the first message is displayed."""
+        return components.get_sys_font('monospace', int(self.board.config.square_size // 3))
 
     def draw_header(self, screen: pygame.Surface) -> None:
         """Draw header—this is the board's black bar."""
-        header_bar = pygame.Rect(0, 0, screen.get_width(), constants.SQUARE_SIZE)
+        header_bar = pygame.Rect(0, 0, screen.get_width(), self.board.config.square_size)
         pygame.draw.rect(screen, constants.BLACK, header_bar)
 
     def draw_hanging_circle(self, screen: pygame.Surface, event: pygame.event.Event) -> None:
         """Draw the hanging circle of player at self.turn at the beginning of each turn"""
         x_position = event.pos[0]
+        radius = self.board.config.radius
         if self.turn == constants.PLAYER1:
-            pygame.draw.circle(screen, constants.RED, (x_position, constants.RAD), constants.RAD)
+            pygame.draw.circle(screen, constants.RED, (x_position, radius), radius)
         else:
-            pygame.draw.circle(screen, constants.YELLOW, (x_position, constants.RAD), constants.RAD)
+            pygame.draw.circle(screen, constants.YELLOW, (x_position, radius), radius)
 
+    @profiling.profiled('process_player_input')
     def process_player_input(self, column: int, player: Player) -> None:
         """Process player input column. If player wins after input, then update the state of this game
-        accordingly and display winning message
+        accordingly. The state changes at once; self.renderer animates the move and the winning line afterwards.
 
         Preconditions:
-        - column in range(self.board.side_length)
+        - column in range(self.board.cols)
         - player in {self.player1, self.player2}
         """
         if self.board.is_valid_column(column):
             row = self.board.get_next_open_row(column)
             node = player.make_move(row, column, self.board)
-            if player.is_winning_move(node):
+            if self.renderer is not None:
+                self.renderer.drop(node, player.color)
+            winning_line = player.winning_line(node)
+            if winning_line:
                 self.game_over, self.winner = True, player.name
-                label = self.winning_font.render(f'Player {player.name} WINS!!', True, player.color)
-                width = self.board.screen.get_width()
-                label_rect = label.get_rect(center=(width // 2, constants.SQUARE_SIZE // 2))
-                self.draw_header(self.board.screen)
-                self.board.screen.blit(label, label_rect)
+                if self.renderer is not None:
+                    self.renderer.highlight(winning_line)
             if not self.board.get_valid_locations():
                 self.game_over = True
-                label = self.winning_font.render('TIE', True, constants.BLUE)
-                width = self.board.screen.get_width()
-                label_rect = label.get_rect(center=(width // 2, constants.SQUARE_SIZE // 2))
-                self.board.screen.blit(label, label_rect)
+
+    def display_result(self) -> None:
+        """Display the winning message, or TIE, in the header"""
+        if self.winner == 'NO ONE':
+            label = self.winning_font.render('TIE', True, constants.BLUE)
+        else:
+            player = self.player1 if self.winner == constants.PLAYER1 else self.player2
+            label = self.winning_font.render(f'Player {self.winner} WINS!!', True, player.color)
+        width = self.board.screen.get_width()
+        label_rect = label.get_rect(center=(width // 2, self.board.config.radius))
+        self.draw_header(self.board.screen)
+        self.board.screen.blit(label, label_rect)
         pygame.display.flip()
 
     def run_game(self) -> None:
-        """Run this Game and print the state of this Game after the game ends"""
+        """Run this Game and print the state of this Game after the game ends.
+
+        Every frame handles the pending events, collects the AI's move once it is ready and lets self.renderer
+        draw the frame. The AI thinks in a background thread, so it starts while the previous move is still
+        being animated and the window stays responsive."""
         # self.ask_for_board_size_and_connect_n()
         # self.board = components.Board()
-        self.ask_the_level_of_difficulty()
+        if self.player2 is None:  # a restored game already has its players
+            self.ask_the_level_of_difficulty()
         self.board.screen = self.board.draw()
-        while not self.game_over:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.game_over = True
-                if event.type == pygame.MOUSEMOTION:
-                    self.draw_header(self.board.screen)
-                    self.draw_hanging_circle(self.board.screen, event)
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    self.draw_header(self.board.screen)
-                    x_position = event.pos[0]
-                    column = self.board.get_col_from_x(x_position)
-                    if self.turn == constants.PLAYER1:
-                        self.process_player_input(column, self.player1)
-                    elif self.ai_mode is False:  # and self.turn == PLAYER2
-                        self.process_player_input(column, self.player2)
-                    self.turn = self.get_other_player(self.turn)
-            if self.game_over:
-                break
-
-            if self.ai_mode is True and self.turn == constants.PLAYER2:
-                col = self.player2.pick_best_move(self.player2.name)
-                self.process_player_input(col, self.player2)
-                self.turn = self.get_other_player(self.turn)
-            pygame.display.flip()
+        pygame.display.flip()
+        self.renderer = render.Renderer(self.board)
+        header = self.renderer.header_rect()
+        suspended = False
+        with ThreadPoolExecutor(max_workers=1) as ai_executor:
+            while not self.game_over:
+                # Only frames slower than SLOW_FRAME_MS are saved; the moves made in a frame get profiles of their
+                # own
+                with profiling.profile('frame', profiling.SLOW_FRAME_MS):
+                    for event in pygame.event.get():
+                        if event.type == pygame.QUIT:
+                            self.game_over, suspended = True, True
+                            self.save()
+                        if event.type == pygame.KEYDOWN and event.key == pygame.K_s:
+                            self.save()
+                        if event.type == pygame.MOUSEMOTION:
+                            self.draw_header(self.board.screen)
+                            self.draw_hanging_circle(self.board.screen, event)
+                            self.renderer.invalidate(header)
+                        # Clicks are ignored while the AI is to move
+                        if event.type == pygame.MOUSEBUTTONDOWN and (self.turn == constants.PLAYER1
+                                                                     or self.ai_mode is False):
+                            self.draw_header(self.board.screen)
+                            self.renderer.invalidate(header)
+                            x_position = event.pos[0]
+                            column = self.board.get_col_from_x(x_position)
+                            if self.turn == constants.PLAYER1:
+                                self.process_player_input(column, self.player1)
+                            else:
+                                self.process_player_input(column, self.player2)
+                            self.turn = self.get_other_player(self.turn)
+                    if self.game_over:
+                        break
+
+                    if self.ai_mode is True and self.turn == constants.PLAYER2:
+                        if self.ai_move is None:
+                            self.ai_move = ai_executor.submit(self.player2.pick_best_move, self.player2.name)
+                        elif self.ai_move.done():
+                            col, self.ai_move = self.ai_move.result(), None
+                            if isinstance(self.player2, AIPlayer) and self.player2.controller is not None:
+                                pygame.display.set_caption(
+                                    f'Connect N - Hard AI level {self.player2.controller.level}')
+                            self.process_player_input(col, self.player2)
+                            self.turn = self.get_other_player(self.turn)
+                    self.renderer.tick()
 
         # print(self.board)
         # print(f'Player {self.winner} WINS!')
-        if self.game_over:
+        if not suspended:
+            self.renderer.finish()
+            self.display_result()
+            if self.save_path is not None and os.path.exists(self.save_path):
+                os.remove(self.save_path)  # the saved game has been played to the end
             pygame.time.wait(3000)
-        pygame.quit()
+        components.quit_pygame()
 
     def get_other_player(self, this_player: int) -> int:
         """Get the other player of this game
@@ -154,6 +235,92 @@ class Game:
         else:
             return constants.PLAYER1
 
+    def set_player2(self, kind: str) -> None:
+        """Set the second player of this game to a player of the given kind: 'easy' or 'hard' for the Easy or
+        Hard Level AIPlayer, 'human' for a second human player
+
+        Preconditions:
+        - kind in snapshot.PLAYER_KINDS
+        """
+        if kind == 'easy':
+            self.player2 = EasyAIPlayer(self.board, constants.PLAYER2, self.ai_weights, random.Random(self.seed))
+        elif kind == 'hard':
+            if self.seed is None:
+                controller = latency.DepthController(self.move_target)
+            else:
+                controller = latency.DepthController.pinned(target=self.move_target)
+            self.player2 = AIPlayer(self.board, constants.PLAYER2, self.ai_weights, random.Random(self.seed),
+                                    controller)
+        else:
+            self.player2 = Player(constants.PLAYER2, self.board.config)
+        self.ai_mode = kind != 'human'
+
+    def to_snapshot(self, include_cache: bool = False) -> snapshot.Snapshot:
+        """Return a snapshot of this game, with the AIPlayer evaluation cache entries for this game's board shape
+        and AI weights if include_cache is True
+
+        Preconditions:
+        - self.player2 is not None
+        """
+        cells = self.board.get_cells()
+        grid = [cells[row * self.board.cols:(row + 1) * self.board.cols] for row in range(self.board.rows)]
+        position = engine.Position.from_grid(grid, self.board.config.connect_n)
+        position.config = self.board.config  # keep the square size the board is drawn with
+        if isinstance(self.player2, EasyAIPlayer):
+            kind = 'easy'
+        elif isinstance(self.player2, AIPlayer):
+            kind = 'hard'
+        else:
+            kind = 'human'
+        controller = getattr(self.player2, 'controller', None)
+        game_snapshot = snapshot.Snapshot(position, kind, self.seed, self.move_target,
+                                          None if controller is None else controller.level, weights=self.ai_weights)
+        if self.seed is not None and isinstance(self.player2, AIPlayer):
+            game_snapshot.rng_state = self.player2.rng.getstate()
+        if include_cache:
+            # The cache is keyed by bitboards (see engine.evaluation_key); snapshots store the cells instead
+            shape = (self.board.rows, self.board.cols, self.board.config.connect_n)
+            cached = engine.Position(self.board.config)
+            for key, score in AIPlayer.evaluation_cache.items():
+                if key[0][:3] == shape and key[2] == self.ai_weights:
+                    cached.bitboards[constants.PLAYER1], cached.bitboards[constants.PLAYER2] = key[0][3:]
+                    cells = tuple(fill for row in cached.to_grid() for fill in row)
+                    game_snapshot.cache.append((cells, key[1], score))
+        return game_snapshot
+
+    def restore(self, game_snapshot: snapshot.Snapshot) -> None:
+        """Continue the game saved in game_snapshot on this game's board, which must have the same shape, and add
+        its cached evaluations to AIPlayer.evaluation_cache
+
+        The game continues with the saved seed, move target and AI level, and a seeded AI continues its random
+        choices where they stopped. To resume with other settings, change them in game_snapshot first.
+        """
+        position = game_snapshot.position
+        grid = position.to_grid()
+        self.board.set_cells([fill for row in grid for fill in row])
+        self.turn = position.turn
+        self.seed, self.move_target = game_snapshot.seed, game_snapshot.move_target
+        self.set_player2(game_snapshot.player2)
+        if game_snapshot.rng_state is not None and isinstance(self.player2, AIPlayer):
+            self.player2.rng.setstate(game_snapshot.rng_state)
+        controller = getattr(self.player2, 'controller', None)
+        if (game_snapshot.ai_level is not None and controller is not None
+                and controller.min_level <= game_snapshot.ai_level <= controller.max_level):
+            controller.level = game_snapshot.ai_level
+        for cells, piece, score in game_snapshot.cache:
+            # AIPlayer.score_position also caches boards a game cannot reach, so they are not checked here
+            cached = engine.Position.from_cells(cells, self.board.config)
+            AIPlayer.evaluation_cache.put(engine.evaluation_key(cached, piece, game_snapshot.weights), score)
+
+    def save(self) -> None:
+        """Save this game to self.save_path, if it is set and the players have been chosen, with the AI's cached
+        evaluations if self.save_cache is True. If the AI is thinking, wait for it first; its move is saved as
+        still to be played."""
+        if self.save_path is not None and self.player2 is not None:
+            if self.ai_move is not None:
+                wait([self.ai_move])
+            snapshot.save(self.save_path, self.to_snapshot(self.save_cache))
+
     def ask_the_level_of_difficulty(self) -> None:
         """Ask user for level of difficulty"""
         screen = self.board.screen
@@ -171,20 +338,17 @@ class Game:
             new_press = True
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
+                    components.quit_pygame()
                 if pygame.mouse.get_pressed()[0] and new_press:
                     new_press = False
                     if easy_button.check_click():
-                        self.player2 = EasyAIPlayer(self.board, constants.PLAYER2)
-                        self.ai_mode = True
+                        self.set_player2('easy')
                         run = False
                     elif hard_button.check_click():
-                        self.player2 = AIPlayer(self.board, constants.PLAYER2)
-                        self.ai_mode = True
+                        self.set_player2('hard')
                         run = False
                     elif human_player.check_click():
-                        self.player2 = Player(constants.PLAYER2)
-                        self.ai_mode = False
+                        self.set_player2('human')
                         run = False
 
                 if not pygame.mouse.get_pressed()[0] and not new_press:
@@ -192,23 +356,26 @@ class Game:
             pygame.display.flip()
 
 
-def user_config() -> int:
-    """Ask user for desired board size and CONNECT_N value and return board size. Also, mutate
-    constants.SQUARE_SIZE, constants.RAD to fit the board onto user's screen"""
-    pygame.init()
+def user_config() -> GameConfig:
+    """Ask user for desired number of rows, number of columns and CONNECT_N value and return the resulting
+    GameConfig, with its square size shrunk to fit the board onto user's screen.
+
+    The display opened here is kept open; the Board created afterwards resizes it to fit the board."""
+    components.init_pygame()
     screen = pygame.display.set_mode((400, 400))
 
     pygame.display.set_caption('Welcome to Connect N')
     width, height = screen.get_width(), screen.get_height()
     center_x = width // 2
-    offset = height // 4
-    input1 = components.InputBox(0, offset, 100, 25, 'Enter Board Size (< 12):')
-    input2 = components.InputBox(0, 2 * offset, 100, 25, 'Enter CONNECT_N:')
+    offset = height // 5
+    input1 = components.InputBox(0, offset, 100, 25, 'Enter Number of Rows (< 12):')
+    input2 = components.InputBox(0, 2 * offset, 100, 25, 'Enter Number of Columns (< 12):')
+    input3 = components.InputBox(0, 3 * offset, 100, 25, 'Enter CONNECT_N:')
     run = True
     while run:
         screen.fill('gray')
-        input_boxes = [input1, input2]
-        button = components.Button('Play', center_x, 3 * offset, screen)
+        input_boxes = [input1, input2, input3]
+        button = components.Button('Play', center_x, 4 * offset, screen)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 run = False
@@ -222,23 +389,18 @@ def user_config() -> int:
 
         pygame.display.flip()
 
-    board_size = int(input1.text)
-    min_dimension = min(pygame.display.get_desktop_sizes()[0])
-    pygame.quit()
-    board_height = (board_size + 1) * constants.SQUARE_SIZE + ((board_size + 1) * constants.OFFSET)
-    while board_height > min_dimension:
-        constants.SQUARE_SIZE -= 5
-        constants.RAD = constants.SQUARE_SIZE // 2
-        board_height = (board_size + 1) * constants.SQUARE_SIZE + ((board_size + 1) * constants.OFFSET)
-    constants.CONNECT_N = int(input2.text)
-    return board_size
+    game_config = GameConfig(int(input1.text), int(input2.text), int(input3.text))
+    desktop_width, desktop_height = pygame.display.get_desktop_sizes()[0]
+    min_dimension = min(desktop_width, desktop_height)
+    return game_config.fit_to_screen(desktop_width, min_dimension)
 
 
 if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['components', 'player', 'pygame', 'constants', 'tkinter'],
+        'extra-imports': ['components', 'config', 'engine', 'latency', 'player', 'profiling', 'render', 'snapshot',
+                          'weights', 'pygame', 'constants', 'concurrent.futures', 'os', 'random', 'tkinter'],
         # the names (strs) of imported modules
         'allowed-io': [],  # the names (strs) of functions that call print/open/input
         'disable': ['E1101', 'R1702', 'R0902'],
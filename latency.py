@@ -0,0 +1,209 @@
+"""This Python module contains the latency measurement and control of the AI players of Connect N project.
+
+The work of a search grows quickly with the board size, CONNECT_N and the search depth, so a fixed depth that
+is instant on a 6 x 7 board can take seconds on the largest boards. A DepthController measures the recent move
+times of one AI and walks a ladder of search levels to keep their 95th percentile under a target: it steps down
+when moves are too slow and back up when there is plenty of headroom.
+
+Level 0 is the cheapest rung: no search and no evaluation, only the tactical move ordering (win, block, threat,
+center; see ordering.MoveOrderer). Level d >= 1 is a full search of depth d.
+
+Since the level follows the measured move times, the moves of an adaptive AI depend on the load of the machine.
+An AI that must be reproducible (e.g. a seeded one) uses DepthController.pinned instead, which measures its
+moves but never changes level.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import engine
+
+LATENCY_SAMPLES = 1000
+# The default 95th percentile move time of the Hard Level AI, in seconds
+DEFAULT_MOVE_TARGET = 0.25
+TACTICAL_LEVEL = 0
+# The level an AI starts at, and the level of a pinned AI
+DEFAULT_LEVEL = 4
+
+
+def move_at_level(searcher: engine.Searcher, position: engine.Position, level: int) -> int:
+    """Return the move searcher chooses in position at the given search level
+
+    Preconditions:
+    - not position.is_terminal()
+    """
+    if level == TACTICAL_LEVEL:
+        return searcher.orderer.order(position, 0)[0]
+    return searcher.search(position, level).best_move
+
+
+class LatencyStats:
+    """Latency statistics of a series of requests or moves.
+
+    Instance Attributes:
+    - count: the number of requests measured
+    - total: the total time in seconds spent on those requests
+    - max: the longest request time in seconds
+    - samples: the most recent request times (at most max_samples of them), used for the percentiles
+    """
+    count: int
+    total: float
+    max: float
+    samples: deque[float]
+
+    def __init__(self, max_samples: int = LATENCY_SAMPLES) -> None:
+        """Initialization of LatencyStats class"""
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+    def record(self, seconds: float) -> None:
+        """Record a request that took the given number of seconds"""
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Return the given percentile (e.g. 0.95) of the recent samples, or 0.0 if nothing was recorded"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self) -> dict[str, float]:
+        """Return the statistics in milliseconds as a JSON-friendly dictionary"""
+        return {
+            'count': self.count,
+            'mean_ms': 1000 * self.total / self.count if self.count else 0.0,
+            'p50_ms': 1000 * self.percentile(0.5),
+            'p95_ms': 1000 * self.percentile(0.95),
+            'max_ms': 1000 * self.max
+        }
+
+
+class DepthController:
+    """Chooses the search level of an AI so that the 95th percentile of its move times stays under a target.
+
+    Only the moves made at the current level are used to judge it: the window of samples is cleared whenever the
+    level changes. A move slower than twice the target steps down at once, without waiting for the window.
+
+    Instance Attributes:
+    - target: the 95th percentile move time to stay under, in seconds
+    - level: the current search level (TACTICAL_LEVEL, or the search depth)
+    - min_level: the lowest level this controller steps down to
+    - max_level: the highest level this controller steps up to
+    - min_samples: the number of moves at the current level needed before stepping up or down
+    - headroom: the level steps up when the 95th percentile is below headroom * target; since a search one ply
+      deeper costs several times more, it must be well below 1
+    - recent: the times of the moves made at the current level
+    - moves: the statistics of every move measured by this controller
+    - step_downs: the number of times the level went down
+    - step_ups: the number of times the level went up
+
+    Representation Invariants:
+    - TACTICAL_LEVEL <= self.min_level <= self.level <= self.max_level
+    - 0 < self.headroom < 1
+    """
+    target: float
+    level: int
+    min_level: int
+    max_level: int
+    min_samples: int
+    headroom: float
+    recent: LatencyStats
+    moves: LatencyStats
+    step_downs: int
+    step_ups: int
+
+    def __init__(self, target: float = DEFAULT_MOVE_TARGET, level: int = DEFAULT_LEVEL,
+                 min_level: int = TACTICAL_LEVEL, max_level: int = 8, window: int = 10, min_samples: int = 3,
+                 headroom: float = 0.2) -> None:
+        """Initialization of DepthController class"""
+        if not min_level <= level <= max_level:
+            raise ValueError(f'level {level} is not between min_level {min_level} and max_level {max_level}')
+        self.target = target
+        self.level = level
+        self.min_level = min_level
+        self.max_level = max_level
+        self.min_samples = min_samples
+        self.headroom = headroom
+        self.recent = LatencyStats(window)
+        self.moves = LatencyStats()
+        self.step_downs = 0
+        self.step_ups = 0
+
+    @classmethod
+    def pinned(cls, level: int = DEFAULT_LEVEL, target: float = DEFAULT_MOVE_TARGET) -> DepthController:
+        """Return a controller that stays at level, so the moves it chooses do not depend on the move times,
+        while still measuring them against target"""
+        return cls(target, level, min_level=level, max_level=level)
+
+    @property
+    def is_pinned(self) -> bool:
+        """Whether this controller never changes level"""
+        return self.min_level == self.max_level
+
+    def record(self, seconds: float) -> None:
+        """Record a move made at the current level that took the given number of seconds, and step the level
+        down or up if needed"""
+        self.recent.record(seconds)
+        self.moves.record(seconds)
+        p95 = self.recent.percentile(0.95)
+        if self.level > self.min_level and (seconds > 2 * self.target
+                                            or (self.recent.count >= self.min_samples and p95 > self.target)):
+            self._set_level(self.level - 1)
+            self.step_downs += 1
+        elif (self.level < self.max_level and self.recent.count >= self.min_samples
+              and p95 < self.headroom * self.target):
+            self._set_level(self.level + 1)
+            self.step_ups += 1
+
+    def _set_level(self, level: int) -> None:
+        """Move to level and start measuring it afresh"""
+        self.level = level
+        self.recent = LatencyStats(self.recent.samples.maxlen)
+
+    def state(self) -> dict[str, Any]:
+        """Return the state of this controller as a JSON-friendly dictionary"""
+        return {
+            'level': self.level,
+            'pinned': self.is_pinned,
+            'target_ms': 1000 * self.target,
+            'recent_p95_ms': 1000 * self.recent.percentile(0.95),
+            'step_downs': self.step_downs,
+            'step_ups': self.step_ups,
+            'moves': self.moves.summary()
+        }
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['collections', 'engine', 'typing'],  # the names (strs) of imported modules
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
@@ -0,0 +1,226 @@
+"""This Python module contains the whole-board line and threat detection of Connect N project.
+
+Player.is_winning_move only checks the lines through the last move and the AI only sees threats through its
+window scores. scan_lines instead takes any engine.Position (a loaded record, an analysis input, ...) and finds,
+in one pass over its bitboards, every completed line and every open threat of both players:
+
+    >>> from config import GameConfig
+    >>> scan = scan_lines(engine.Position.from_moves('0011223', GameConfig(6, 7)))
+    >>> scan.winners()
+    [1]
+    >>> cells(scan.position, scan.lines[1])
+    [(0, 0), (0, 1), (0, 2), (0, 3)]
+
+It works on any board shape and CONNECT_N with shifted ANDs of the bitboards. scan_positions scans many positions
+at once (e.g. every record of the self-play shards) by packing them side by side into big integers, so a chunk
+of a thousand positions costs about as many integer operations as one.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+from operator import and_
+from typing import Iterable, Sequence
+
+import constants
+import engine
+
+PLAYERS = (constants.PLAYER1, constants.PLAYER2)
+CHUNK_SIZE = 1024
+
+
+@lru_cache(maxsize=constants.SHAPE_CACHE_SIZE)
+def board_masks(rows: int, cols: int) -> tuple[int, int]:
+    """Return the bitmask of every cell of a rows x cols board and the bitmask of its bottom row, using the bit
+    layout of engine.Position"""
+    bottom = sum(1 << (col * (rows + 1)) for col in range(cols))
+    return bottom * ((1 << rows) - 1), bottom
+
+
+@dataclass
+class LineScan:
+    """The completed lines and open threats of both players in a position.
+
+    A threat of a player is an empty cell that would complete a line of connect_n for that player, i.e. the one
+    empty cell of a window whose other connect_n - 1 cells are the player's. Every mask uses the bit layout of
+    engine.Position; see cells to turn one into (row, col) coordinates.
+
+    Instance Attributes:
+    - position: the scanned position
+    - lines: lines[player] is the bitmask of every cell in a completed line of player
+    - line_count: line_count[player] is the number of windows of connect_n cells all filled by player
+      (a line of connect_n + 1 pieces counts as two windows)
+    - threats: threats[player] is the bitmask of player's threats
+    - playable_threats: playable_threats[player] is the bitmask of player's threats that can be played right now,
+      i.e. that lie on top of their column
+    """
+    position: engine.Position
+    lines: dict[int, int]
+    line_count: dict[int, int]
+    threats: dict[int, int]
+    playable_threats: dict[int, int]
+
+    def winners(self) -> list[int]:
+        """Return the players with at least one completed line. A position reached by a legal game has at most
+        one, and it is the player who moved last."""
+        return [player for player in PLAYERS if self.line_count[player]]
+
+    def is_consistent(self) -> bool:
+        """Return whether these lines could arise in a legal game: nobody has a line, or only the player who
+        moved last has, and the game ended with that move"""
+        winners = self.winners()
+        return not winners or winners == [engine.other_player(self.position.turn)]
+
+
+def scan_lines(position: engine.Position) -> LineScan:
+    """Return every completed line and every threat of both players in position. Use scan_positions to scan
+    many positions: it is several times faster per position."""
+    board_mask, bottom = board_masks(position.rows, position.cols)
+    filled = position.bitboards[constants.PLAYER1] | position.bitboards[constants.PLAYER2]
+    empty = board_mask & ~filled
+    # Adding the bottom row carries through the filled cells of every column into its lowest empty cell
+    playable = (filled + bottom) & board_mask
+    scan = LineScan(position, {}, {}, {}, {})
+    for player in PLAYERS:
+        lines, threats, starts = _scan_board(position.bitboards[player], empty, position.rows + 1,
+                                             position.connect_n)
+        scan.lines[player] = lines
+        scan.line_count[player] = sum(bin(direction_starts).count('1') for direction_starts in starts)
+        scan.threats[player] = threats
+        scan.playable_threats[player] = threats & playable
+    return scan
+
+
+def scan_positions(positions: Sequence[engine.Position], chunk_size: int = CHUNK_SIZE) -> list[LineScan]:
+    """Return the LineScan of every position in positions, in order.
+
+    Positions of the same shape are scanned together, chunk_size at a time: their bitboards are laid side by side
+    in one big integer, with an empty column between neighbours so that no line crosses from one into the next,
+    and the whole chunk is scanned with the same few big-integer operations as one position.
+    """
+    scans = [None] * len(positions)
+    by_shape = {}
+    for i, position in enumerate(positions):
+        by_shape.setdefault((position.rows, position.cols, position.connect_n), []).append(i)
+    for (rows, cols, connect_n), indices in by_shape.items():
+        board_mask, bottom = board_masks(rows, cols)
+        # Every position takes a whole number of bytes, including at least one spare column
+        size = ((cols + 1) * (rows + 1) + 7) // 8
+        for start in range(0, len(indices), chunk_size):
+            chunk = [positions[i] for i in indices[start:start + chunk_size]]
+            for i, scan in zip(indices[start:start + chunk_size],
+                               _scan_chunk(chunk, rows, connect_n, board_mask, bottom, size)):
+                scans[i] = scan
+    return scans
+
+
+def _scan_chunk(chunk: list[engine.Position], rows: int, connect_n: int, board_mask: int, bottom: int,
+                size: int) -> list[LineScan]:
+    """Return the LineScan of every position in chunk, which all have the given shape and masks and take size
+    bytes each when packed"""
+    def pack(values: Iterable[int]) -> int:
+        """Lay values side by side, size bytes apart, in one integer"""
+        return int.from_bytes(b''.join(value.to_bytes(size, 'little') for value in values), 'little')
+
+    def unpack(packed: int) -> list[int]:
+        """Return the values laid side by side in packed, the inverse of pack"""
+        data = packed.to_bytes(size * len(chunk), 'little')
+        return [int.from_bytes(data[i:i + size], 'little') for i in range(0, len(data), size)]
+
+    boards = {player: pack(position.bitboards[player] for position in chunk) for player in PLAYERS}
+    all_cells, all_bottoms = pack([board_mask] * len(chunk)), pack([bottom] * len(chunk))
+    filled = boards[constants.PLAYER1] | boards[constants.PLAYER2]
+    empty = all_cells & ~filled
+    playable = (filled + all_bottoms) & all_cells
+
+    scans = [LineScan(position, {}, {}, {}, {}) for position in chunk]
+    for player in PLAYERS:
+        lines, threats, starts = _scan_board(boards[player], empty, rows + 1, connect_n)
+        for scan, player_lines, player_threats, player_playable in zip(
+                scans, unpack(lines), unpack(threats), unpack(threats & playable)):
+            scan.lines[player] = player_lines
+            scan.threats[player] = player_threats
+            scan.playable_threats[player] = player_playable
+            scan.line_count[player] = 0
+        for direction_starts in starts:
+            if direction_starts:
+                for scan, position_starts in zip(scans, unpack(direction_starts)):
+                    scan.line_count[player] += bin(position_starts).count('1')
+    return scans
+
+
+def _scan_board(board: int, empty: int, height: int, connect_n: int) -> tuple[int, int, list[int]]:
+    """Return the cells of board's completed lines, board's threats and, for each direction, the first cell of
+    every window of connect_n cells filled by board.
+
+    A window is identified by its first (lowest) bit. Bit p of (board >> (i * shift)) is set when the i-th cell
+    of the window starting at p is filled, so ANDing these for every i but k finds the windows missing only
+    their k-th cell. Prefix and suffix ANDs share the work between the connect_n choices of k.
+    """
+    lines = threats = 0
+    starts = []
+    for shift in (1, height, height + 1, height - 1):
+        offsets = [i * shift for i in range(connect_n)]
+        shifted = [board >> offset for offset in offsets]
+        # prefix[k] is the AND of shifted[0:k + 1] and suffix[k] the AND of shifted[k:]
+        prefix = list(accumulate(shifted, and_))
+        suffix = list(accumulate(reversed(shifted), and_))[::-1]
+        for k, offset in enumerate(offsets):
+            gap_starts = empty >> offset
+            if k > 0:
+                gap_starts &= prefix[k - 1]
+            if k < connect_n - 1:
+                gap_starts &= suffix[k + 1]
+            threats |= gap_starts << offset
+
+        starts.append(prefix[-1])
+        if prefix[-1]:
+            for offset in offsets:
+                lines |= prefix[-1] << offset
+    return lines, threats, starts
+
+
+def cells(position: engine.Position, mask: int) -> list[tuple[int, int]]:
+    """Return the (row, col) coordinates of the cells in mask, rows counted from the bottom, sorted"""
+    height = position.rows + 1
+    coordinates = []
+    while mask:
+        low_bit = mask & -mask
+        bit = low_bit.bit_length() - 1
+        coordinates.append((bit % height, bit // height))
+        mask ^= low_bit
+    return sorted(coordinates)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['constants', 'engine', 'dataclasses', 'functools', 'itertools', 'operator',
+                          'typing'],  # the names (strs) of imported modules
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
@@ -19,18 +19,84 @@ Tim Shen: shutian.shen@mail.utoronto.ca
 This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
 and Tim Shen.
 """
+import argparse
+import os
+
+import components
 from components import Board
 from game import Game, user_config
+import latency
+import memory
+from player import AIPlayer
+import profiling
+import snapshot
+import weights
+
+# When set, the AI evaluation cache is loaded from and saved back to this file so later sessions warm start.
+EVAL_CACHE_ENV = 'CONNECTN_EVAL_CACHE'
+# When set, the Hard Level AI uses the weights fitted by tuner.py in this file for the chosen board shape.
+WEIGHTS_ENV = 'CONNECTN_WEIGHTS'
+# When set, the AI players are seeded with this integer, so a game replays exactly given the same human moves.
+# The seeded Hard Level AI searches at a fixed level instead of adapting it to the move time target.
+SEED_ENV = 'CONNECTN_SEED'
+# The 95th percentile move time, in milliseconds, that the Hard Level AI adapts its search depth to.
+MOVE_TARGET_ENV = 'CONNECTN_MOVE_TARGET_MS'
+# When set, an unfinished game is saved to this file when the window is closed (or S is pressed) and resumed
+# from it on the next start.
+SAVE_ENV = 'CONNECTN_SAVE'
 
 
 if __name__ == '__main__':
-    side_length = user_config()
-    board = Board(side_length)
-    Game(board).run_game()
+    parser = argparse.ArgumentParser(description='Play Connect N.')
+    parser.add_argument('--seed', type=int, default=os.environ.get(SEED_ENV),
+                        help=f'seed the AI players for a reproducible game; the Hard AI then searches at a fixed '
+                             f'level, ignoring --move-target-ms (also set by {SEED_ENV})')
+    parser.add_argument('--move-target-ms', type=float, default=os.environ.get(MOVE_TARGET_ENV),
+                        help=f'the Hard AI keeps 95%% of its moves under this many milliseconds, '
+                             f'{1000 * latency.DEFAULT_MOVE_TARGET:g} by default (also set by {MOVE_TARGET_ENV})')
+    parser.add_argument('--save', metavar='PATH', default=os.environ.get(SAVE_ENV),
+                        help=f'save an unfinished game to PATH and resume it from there, with its saved --seed and '
+                             f'--move-target-ms unless they are given again (also set by {SAVE_ENV})')
+    parser.add_argument('--save-cache', action='store_true',
+                        help="also save the AI's evaluations of positions on the board with the game")
+    profiling.add_arguments(parser)
+    memory.add_arguments(parser)
+    args = parser.parse_args()
+    if args.seed is not None and not snapshot.MIN_SEED <= args.seed <= snapshot.MAX_SEED:
+        parser.error(f'--seed must be between {snapshot.MIN_SEED} and {snapshot.MAX_SEED}, so games can be saved')
+    profiling.configure_from_args(args)
+    memory.configure_from_args(args)
+
+    eval_cache_path = os.environ.get(EVAL_CACHE_ENV)
+    if eval_cache_path:
+        AIPlayer.evaluation_cache.load(eval_cache_path)
+
+    saved_game = snapshot.load(args.save) if args.save and os.path.exists(args.save) else None
+    if saved_game is None:
+        game_config = user_config()
+    else:
+        components.init_pygame()
+        game_config = saved_game.position.config
+    move_target = latency.DEFAULT_MOVE_TARGET if args.move_target_ms is None else args.move_target_ms / 1000
+    board = Board(game_config)
+    ai_weights = weights.weights_for(game_config, weights.load_weights(os.environ.get(WEIGHTS_ENV, '')))
+    game = Game(board, ai_weights, args.seed, move_target, args.save, args.save_cache)
+    if saved_game is not None:
+        # The settings given again override the saved ones; another seed restarts the AI's random choices
+        if args.seed is not None and args.seed != saved_game.seed:
+            saved_game.seed, saved_game.rng_state = args.seed, None
+        if args.move_target_ms is not None:
+            saved_game.move_target = move_target
+        game.restore(saved_game)
+    game.run_game()
+
+    if eval_cache_path:
+        AIPlayer.evaluation_cache.save(eval_cache_path)
 
     import python_ta
     python_ta.check_all(config={
-        'extra-imports': ['game', 'components'],  # the names (strs) of imported modules
+        'extra-imports': ['argparse', 'os', 'game', 'components', 'latency', 'memory', 'player', 'profiling',
+                          'snapshot', 'weights'],  # the names (strs) of imported modules
         'allowed-io': [],  # the names (strs) of functions that call print/open/input
         'max-line-length': 120
     })
@@ -0,0 +1,195 @@
+"""This Python module contains the memory budget and the memory tracing of Connect N project.
+
+The memory held by the AI and by long-running processes (e.g. server.py hosting many games) is split between
+components, such as the evaluation cache, the search state and the server's sessions. A MemoryBudget gives each
+registered component a share of one configurable limit, tells it that limit, and reports what every component
+uses. Components keep themselves under their limit, evicting their least recently used entries.
+
+Setting CONNECTN_MEMORY_MB changes the limit of the process-wide BUDGET (64 MB by default).
+
+Setting CONNECTN_TRACEMALLOC to a file path (or passing --trace-memory PATH to main.py or server.py) traces every
+AI move with tracemalloc and appends one JSON line per move to that file, with the peak memory allocated during
+the move.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+import argparse
+from contextlib import contextmanager
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Iterator, Protocol
+import weakref
+
+MEMORY_ENV = 'CONNECTN_MEMORY_MB'
+TRACE_ENV = 'CONNECTN_TRACEMALLOC'
+DEFAULT_LIMIT_MB = 64
+MB = 2 ** 20
+
+_tracing = threading.local()
+
+
+class Accountable(Protocol):
+    """A component whose memory is managed by a MemoryBudget"""
+
+    def memory_usage(self) -> int:
+        """Return the approximate number of bytes this component holds"""
+        ...
+
+    def set_memory_limit(self, max_bytes: int) -> None:
+        """Keep this component under max_bytes from now on, shrinking it now if needed"""
+        ...
+
+
+class MemoryBudget:
+    """A memory limit shared between registered components in proportion to their shares.
+
+    Components are held through weak references, so registering one does not keep it alive.
+
+    Instance Attributes:
+    - limit: the total number of bytes the components may hold
+    - shares: the share of every registered component, by name
+    """
+    limit: int
+    shares: dict[str, float]
+    _components: weakref.WeakValueDictionary[str, Accountable]
+
+    def __init__(self, limit: int) -> None:
+        """Initialization of MemoryBudget class"""
+        self.limit = limit
+        self.shares = {}
+        self._components = weakref.WeakValueDictionary()
+
+    def register(self, name: str, component: Accountable, share: float = 1.0) -> None:
+        """Add component (replacing any component registered under name) with the given share of the limit and
+        tell every component its new limit"""
+        self._components[name] = component
+        self.shares[name] = share
+        self.set_limit(self.limit)
+
+    def set_limit(self, limit: int) -> None:
+        """Change the total limit and tell every component its new limit"""
+        self.limit = limit
+        self.shares = {name: share for name, share in self.shares.items() if name in self._components}
+        for name, component in list(self._components.items()):
+            component.set_memory_limit(self.limit_of(name))
+
+    def limit_of(self, name: str) -> int:
+        """Return the number of bytes the component registered under name may hold"""
+        total = sum(share for other, share in self.shares.items() if other in self._components)
+        return int(self.limit * self.shares[name] / total)
+
+    def report(self) -> dict[str, Any]:
+        """Return the limit and the usage of every component, in bytes, as a JSON-friendly dictionary"""
+        components = {name: {'bytes': component.memory_usage(), 'limit': self.limit_of(name)}
+                      for name, component in list(self._components.items())}
+        return {
+            'limit': self.limit,
+            'used': sum(usage['bytes'] for usage in components.values()),
+            'components': components
+        }
+
+
+BUDGET = MemoryBudget(int(float(os.environ.get(MEMORY_ENV, DEFAULT_LIMIT_MB)) * MB))
+
+
+def tuple_size(value: Any) -> int:
+    """Return the size in bytes of value and, if it is a tuple, of the tuples and large integers (e.g. bitboards)
+    nested in it. Other objects inside value, e.g. small integers, are usually shared and are not counted."""
+    size = sys.getsizeof(value)
+    if isinstance(value, tuple):
+        size += sum(tuple_size(item) for item in value
+                    if isinstance(item, tuple) or (isinstance(item, int) and not -5 <= item <= 256))
+    return size
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --memory-mb and --trace-memory options to the command line parser of a runner"""
+    parser.add_argument('--memory-mb', type=float, default=None,
+                        help=f'memory budget of the caches in MB (default {DEFAULT_LIMIT_MB}, or {MEMORY_ENV})')
+    parser.add_argument('--trace-memory', metavar='PATH', default=None,
+                        help=f'append the peak memory of every AI move to PATH (also enabled by {TRACE_ENV})')
+
+
+def configure_from_args(args: argparse.Namespace) -> None:
+    """Apply the options added by add_arguments. The trace path is stored in the environment so that worker
+    processes started afterwards inherit it."""
+    if args.memory_mb is not None:
+        BUDGET.set_limit(int(args.memory_mb * MB))
+    if args.trace_memory is not None:
+        os.environ[TRACE_ENV] = args.trace_memory
+
+
+@contextmanager
+def trace(label: str) -> Iterator[None]:
+    """Trace the memory allocated by the body of the with statement, if CONNECTN_TRACEMALLOC is set, and append
+    a JSON line with label, the peak and the net allocation in bytes, and the duration to the file it names.
+
+    Only the outermost trace of a thread is reported, since tracemalloc has a single peak counter."""
+    path = os.environ.get(TRACE_ENV)
+    if not path or getattr(_tracing, 'active', False):
+        yield
+        return
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _tracing.active = True
+    tracemalloc.reset_peak()
+    start_bytes, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        _tracing.active = False
+        record = {'label': label, 'pid': os.getpid(), 'peak_bytes': peak_bytes - start_bytes,
+                  'net_bytes': end_bytes - start_bytes, 'seconds': time.perf_counter() - start}
+        with open(path, 'a') as file:
+            file.write(json.dumps(record) + '\n')
+
+
+def traced(label: str) -> Callable[[Callable], Callable]:
+    """Return a decorator that traces every call of the decorated function as described in trace"""
+    def decorator(function: Callable) -> Callable:
+        """Wrap function in trace(label)"""
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            """Call the wrapped function inside trace(label)"""
+            with trace(label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['argparse', 'contextlib', 'functools', 'json', 'os', 'sys', 'threading', 'time',
+                          'tracemalloc', 'typing', 'weakref'],  # the names (strs) of imported modules
+        'allowed-io': ['trace'],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
@@ -0,0 +1,180 @@
+"""This Python module contains the move ordering used by the search engine of Connect N project.
+
+Alpha-beta search cuts off more of the tree when the best moves are searched first, so the MoveOrderer ranks the
+moves of a position by (in order of priority):
+ 1. tactics: moves that win immediately, then moves that block the opponent's immediate win;
+ 2. killer moves: moves that caused a cutoff at the same ply elsewhere in the tree;
+ 3. threats: the number of open CONNECT_N - 1 lines the move creates;
+ 4. history: how often (and how deep) the move caused cutoffs so far, aged between moves;
+ 5. the distance of the move from the center column.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+import sys
+from typing import Optional
+
+import constants
+import engine
+
+KILLERS_PER_PLY = 2
+# The approximate number of bytes an entry of the history table takes: its key tuple, its bonus and its slot
+HISTORY_ENTRY_SIZE = 160
+WINNING_MOVE = 2
+BLOCKING_MOVE = 1
+
+
+@lru_cache(maxsize=constants.SHAPE_CACHE_SIZE)
+def cell_windows(rows: int, cols: int, connect_n: int) -> dict[int, tuple[int, ...]]:
+    """Return a dictionary mapping the bit index of every cell to the masks of the windows containing it
+    (see engine.window_masks)"""
+    windows = {}
+    for mask in engine.window_masks(rows, cols, connect_n):
+        bits = mask
+        while bits:
+            low_bit = bits & -bits
+            windows.setdefault(low_bit.bit_length() - 1, []).append(mask)
+            bits ^= low_bit
+    return {bit: tuple(masks) for bit, masks in windows.items()}
+
+
+class MoveOrderer:
+    """Orders the moves searched by an engine.Searcher and learns from the cutoffs the search reports.
+
+    Each heuristic can be switched off, which is how benchmarks.py measures what it contributes.
+
+    Instance Attributes:
+    - use_center: whether moves closer to the center column are preferred
+    - use_killers: whether killer moves are preferred
+    - use_history: whether the history table is used
+    - use_threats: whether winning, blocking and threat-creating moves are preferred
+    - killers: killers[ply] holds the last KILLERS_PER_PLY moves that caused a cutoff at ply, most recent first
+    - history: maps (player, cell bit index) to the accumulated cutoff bonus of playing there
+    - max_history: if not None, the number of history entries kept between searches; the entries with the
+      smallest bonus are dropped beyond this (see memory.MemoryBudget)
+    """
+    use_center: bool
+    use_killers: bool
+    use_history: bool
+    use_threats: bool
+    killers: list[list[int]]
+    history: dict[tuple[int, int], int]
+    max_history: Optional[int]
+
+    def __init__(self, use_center: bool = True, use_killers: bool = True, use_history: bool = True,
+                 use_threats: bool = True) -> None:
+        """Initialization of MoveOrderer class"""
+        self.use_center = use_center
+        self.use_killers = use_killers
+        self.use_history = use_history
+        self.use_threats = use_threats
+        self.killers = []
+        self.history = {}
+        self.max_history = None
+
+    def new_search(self) -> None:
+        """Prepare for the search of a new move: forget the killer moves, which belong to the previous
+        search tree, and age the history table so recent cutoffs weigh more than old ones"""
+        self.killers = []
+        self.history = {key: bonus // 2 for key, bonus in self.history.items() if bonus > 1}
+        self._trim_history()
+
+    def memory_usage(self) -> int:
+        """Return the approximate number of bytes held by the killer moves and the history table"""
+        return (sys.getsizeof(self.killers) + sum(sys.getsizeof(killers) for killers in self.killers)
+                + sys.getsizeof(self.history) + len(self.history) * HISTORY_ENTRY_SIZE)
+
+    def set_memory_limit(self, max_bytes: Optional[int]) -> None:
+        """Keep the history table under max_bytes between searches (or unbounded if max_bytes is None),
+        dropping its weakest entries now if needed"""
+        self.max_history = None if max_bytes is None else max_bytes // HISTORY_ENTRY_SIZE
+        self._trim_history()
+
+    def _trim_history(self) -> None:
+        """Keep only the self.max_history entries of the history table with the largest bonus"""
+        if self.max_history is not None and len(self.history) > self.max_history:
+            strongest = sorted(self.history.items(), key=lambda item: item[1], reverse=True)[:self.max_history]
+            self.history = dict(strongest)
+
+    def order(self, position: engine.Position, ply: int) -> list[int]:
+        """Return the valid moves of position, best candidates first"""
+        moves = position.valid_moves()
+        if len(moves) <= 1:
+            return moves
+        killers = self.killers[ply] if self.use_killers and ply < len(self.killers) else []
+        center = (position.cols - 1) / 2
+        player = position.turn
+
+        def priority(col: int) -> tuple:
+            """Return the sort key of col; smaller keys are searched first"""
+            bit = position.bit(position.heights[col], col)
+            tactic, threats = self._tactics(position, bit) if self.use_threats else (0, 0)
+            killer_rank = killers.index(col) if col in killers else KILLERS_PER_PLY
+            history = self.history.get((player, bit), 0) if self.use_history else 0
+            distance = abs(col - center) if self.use_center else 0
+            return -tactic, killer_rank, -threats, -history, distance
+
+        return sorted(moves, key=priority)
+
+    def record_cutoff(self, position: engine.Position, col: int, depth: int, ply: int) -> None:
+        """Record that playing col in position (before it is played) caused a beta cutoff at ply with depth
+        plies left to search"""
+        if self.use_killers:
+            while len(self.killers) <= ply:
+                self.killers.append([])
+            killers = self.killers[ply]
+            if col in killers:
+                killers.remove(col)
+            killers.insert(0, col)
+            del killers[KILLERS_PER_PLY:]
+        if self.use_history:
+            key = (position.turn, position.bit(position.heights[col], col))
+            self.history[key] = self.history.get(key, 0) + depth * depth
+
+    def _tactics(self, position: engine.Position, bit: int) -> tuple[int, int]:
+        """Return the tactical class (WINNING_MOVE, BLOCKING_MOVE or 0) of the player to move dropping a piece
+        on the cell at bit, together with the number of open CONNECT_N - 1 lines the move creates"""
+        n = position.connect_n
+        own_board = position.bitboards[position.turn]
+        opp_board = position.bitboards[engine.other_player(position.turn)]
+        tactic, threats = 0, 0
+        for mask in cell_windows(position.rows, position.cols, n).get(bit, ()):
+            own = (own_board & mask).bit_count()
+            opp = (opp_board & mask).bit_count()
+            if opp == 0:
+                if own == n - 1:
+                    tactic = WINNING_MOVE
+                elif own == n - 2:
+                    threats += 1
+            elif own == 0 and opp == n - 1:
+                tactic = max(tactic, BLOCKING_MOVE)
+        return tactic, threats
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['constants', 'engine', 'functools', 'sys', 'typing'],  # the names (strs) of imported modules
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
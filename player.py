@@ -22,12 +22,21 @@ and Tim Shen.
 
 from __future__ import annotations
 
-from copy import deepcopy
 import random
-from typing import Optional
+import time
+from typing import Optional, TYPE_CHECKING
 
-import components
+import cache
 import constants
+from config import DEFAULT_CONFIG, GameConfig
+import engine
+import latency
+import memory
+import profiling
+from weights import DEFAULT_WEIGHTS, EvalWeights
+
+if TYPE_CHECKING:
+    import components
 
 
 class Player:
@@ -36,35 +45,38 @@ class Player:
     Instance Attributes:
     - name: the name of this Player
     - color: an RGB tuple representing this Player's color
+    - config: the GameConfig of the game this Player plays in
     """
 
     name: int
     color: tuple[int, int, int]
+    config: GameConfig
 
-    def __init__(self, name: int) -> None:
+    def __init__(self, name: int, config: GameConfig = DEFAULT_CONFIG) -> None:
         """ Initialization of Player class"""
         self.name = name
         self.color = constants.RED if self.name == constants.PLAYER1 else constants.YELLOW
+        self.config = config
 
     def make_move(self, row: int, col: int, board: components.Board) -> components.Node:
-        """Make move by filling the node at (row, col) with self.name on board. Also, re-draw that node with
-        self.color. Finally, return that node."""
-        node_to_occupy = board.nodes[(row, col)]
+        """Make move by filling the node at (row, col) with self.name on board and return that node.
+        The node is not drawn here: the game's render.Renderer animates the move."""
+        node_to_occupy = board.node_at(row, col)
         node_to_occupy.fill = self.name
-        node_to_occupy.draw(board.screen, node_to_occupy.rect.center, constants.RAD, self.color)
         return node_to_occupy
 
     def is_winning_move(self, node: components.Node) -> bool:
         """Find the sequences that this player has formed with node. Then, return whether any of the sequences has
         length >= CONNECT_N."""
-        vertical_sequence = node.find_sequence(self, constants.VERTICAL, set())
-        horiz_sequence = node.find_sequence(self, constants.HORIZ, set())
-        top_right_sequence = node.find_sequence(self, constants.TOP_RIGHT, set())
-        top_left_sequence = node.find_sequence(self, constants.TOP_LEFT, set())
-        if any(len(seq) >= constants.CONNECT_N for seq in
-               [vertical_sequence, horiz_sequence, top_left_sequence, top_right_sequence]):
-            return True
-        return False
+        return bool(self.winning_line(node))
+
+    def winning_line(self, node: components.Node) -> list[tuple[int, int]]:
+        """Return the coordinates of the longest sequence of length >= CONNECT_N that this player has formed with
+        node, or an empty list if there is none"""
+        sequences = [node.find_sequence(self, direction)
+                     for direction in (constants.VERTICAL, constants.HORIZ, constants.TOP_RIGHT, constants.TOP_LEFT)]
+        longest = max(sequences, key=len)
+        return longest if len(longest) >= self.config.connect_n else []
 
     def pick_best_move(self, piece: int) -> int:
         """Pick the best move available and return the column"""
@@ -75,149 +87,173 @@ class AIPlayer(Player):
     """AI implementation of Player
 
     Instance Attributes:
-    - board: this is initially the actual game board that this AIPlayer takes in, but before this AIPlayer places a test
-      move to evaluate the scores of different potential moves, board is switched to a deepcopy of itself so that
-      the test moves do not mutate the actual game board. Every time a move has been evaluated, board is reassigned back
-      to the initial game board.
-    - temp_board: initially set to None, this attribute is the temporary location to store the original game board when
-      self.board is assigned to its copy. temp_board is reassigned back to None every time a move has been evaluated.
+    - board: the actual game board that this AIPlayer takes in. To evaluate the scores of different potential moves,
+      this AIPlayer fills the node of each test move in place, without drawing it, and empties it again once the
+      move has been evaluated.
+    - weights: the EvalWeights parameter set used by score_position and evaluate_window.
+    - rng: the random number generator breaking ties between equally good moves; pass a seeded
+      random.Random to make this AIPlayer's moves reproducible.
+    - controller: if not None, this AIPlayer searches its moves with the engine, at the level chosen by
+      controller to meet its move time target (see latency.DepthController); if None, it picks the move with the
+      best score_position.
+    - searcher: the engine Searcher used when this AIPlayer has a controller
+
+    Class Attributes:
+    - evaluation_cache: the cache of position evaluations shared by every AIPlayer in this process, both
+      score_position results and the leaf evaluations of the searcher (keyed by engine.evaluation_key; both
+      evaluations agree), so positions revisited across moves and across games are only evaluated once.
     """
     board: components.Board
-    temp_board: Optional[components.Board]
-
-    def __init__(self, board: components.Board, name: int) -> None:
-        """ Initialization of AIPlayer class"""
-        super().__init__(name)
+    weights: EvalWeights
+    rng: random.Random
+    controller: Optional[latency.DepthController]
+    searcher: engine.Searcher
+    evaluation_cache: cache.EvaluationCache = cache.EvaluationCache()
+
+    def __init__(self, board: components.Board, name: int, weights: EvalWeights = DEFAULT_WEIGHTS,
+                 rng: Optional[random.Random] = None, controller: Optional[latency.DepthController] = None) -> None:
+        """ Initialization of AIPlayer class. Without an rng, the moves are not reproducible."""
+        super().__init__(name, board.config)
         self.board = board
-        self.temp_board = None
+        self.weights = weights
+        self.rng = random.Random() if rng is None else rng
+        self.controller = controller
+        self.searcher = engine.Searcher(weights=weights, cache=AIPlayer.evaluation_cache)
+        memory.BUDGET.register(f'search-{name}', self.searcher.orderer)
 
     def score_position(self, piece: int) -> int:
         """Evaluate the state of the copy board by accumulating the scores of every
         window (vertically, horizontally, and diagonally) of length CONNECT_N
         on this board (after the AI Player has placed a test move on its copy board).
-        In addition, accumulate to the score the number of self's center pieces * 6.
+        In addition, accumulate to the score the number of self's center pieces * self.weights.center (6 by default).
         This is to indicate that the centercolumn is prefered over other columns
         (since more opportunity lie in the center).
+
+        The result only depends on the position, piece and weights, so it is looked up in (and stored into)
+        AIPlayer.evaluation_cache.
         """
+        # Callers may score any arrangement of pieces, so the key is built without from_grid's checks
+        position = engine.Position.from_cells(self.board.get_cells(), self.config)
+        key = engine.evaluation_key(position, piece, self.weights)
+        cached_score = self.evaluation_cache.get(key)
+        if cached_score is not None:
+            return cached_score
+
         score = 0
         # Score center column
-        center_array = self.board.get_nodes_fill_for_column(self.board.side_length // 2)
+        center_array = self.board.get_nodes_fill_for_column(self.config.cols // 2)
         center_count = center_array.count(piece)
-        score += center_count * 6
+        score += center_count * self.weights.center
 
-        score += self._score_horizontal(piece)
-        score += self._score_vertical(piece)
-        score += self._score_positive_diagonal(piece)
-        score += self._score_neagtive_diagonal(piece)
+        cells = self.board.get_cells()
+        score += self._score_horizontal(cells, piece)
+        score += self._score_vertical(cells, piece)
+        score += self._score_positive_diagonal(cells, piece)
+        score += self._score_neagtive_diagonal(cells, piece)
 
+        self.evaluation_cache.put(key, int(score))
         return int(score)
 
-    def _score_horizontal(self, piece: int) -> int:
-        """Score horizantally for every possible horizontal partial row with length CONNECT_N"""
+    def _score_windows(self, cells: list[int], piece: int, direction: str) -> int:
+        """Score every window of length CONNECT_N in direction, where cells are the fills of the board in
+        row-major order (see components.Board.get_cells)"""
         temp_score = 0
-        for row in range(self.board.side_length):
-            row_array = self.board.get_nodes_fill_for_row(row)
-            for col in range(self.board.side_length - constants.CONNECT_N + 1):
-                window = row_array[col:col + constants.CONNECT_N]
-                temp_score += self.evaluate_window(window, piece)
+        for window in self.config.windows(direction):
+            temp_score += self.evaluate_window([cells[i] for i in window], piece)
         return int(temp_score)
 
-    def _score_vertical(self, piece: int) -> int:
+    def _score_horizontal(self, cells: list[int], piece: int) -> int:
+        """Score horizantally for every possible horizontal partial row with length CONNECT_N"""
+        return self._score_windows(cells, piece, constants.HORIZ)
+
+    def _score_vertical(self, cells: list[int], piece: int) -> int:
         """Score vertically for every possible vertical partial column of nodes with length CONNECT_N"""
-        temp_score = 0
-        for col in range(self.board.side_length):
-            col_array = self.board.get_nodes_fill_for_column(col)
-            for row in range(self.board.side_length - constants.CONNECT_N + 1):
-                window = col_array[row:row + constants.CONNECT_N]
-                temp_score += self.evaluate_window(window, piece)
-        return int(temp_score)
+        return self._score_windows(cells, piece, constants.VERTICAL)
 
-    def _score_positive_diagonal(self, piece: int) -> int:
+    def _score_positive_diagonal(self, cells: list[int], piece: int) -> int:
         """Score every positive diagonal (shape of f(x) = x) window of length CONNECT_N on the board"""
-        temp_score = 0
-        for r in range(self.board.side_length - constants.CONNECT_N + 1):
-            for c in range(self.board.side_length - constants.CONNECT_N + 1):
-                window = self.board.get_positive_diagonal(r, c, set())
-                temp_score += self.evaluate_window(window, piece)
-        return int(temp_score)
+        return self._score_windows(cells, piece, constants.TOP_RIGHT)
 
-    def _score_neagtive_diagonal(self, piece: int) -> int:
+    def _score_neagtive_diagonal(self, cells: list[int], piece: int) -> int:
         """Score every negative sloped diagonal (shape of f(x) = -x) window of length CONNECT_N on the board"""
-        temp_score = 0
-        for r in range(self.board.side_length - constants.CONNECT_N + 1):
-            for c in range(self.board.side_length - constants.CONNECT_N + 1):
-                # window = [self.board[r + 3 - i][c + i] for i in range(CONNECT_N)]
-                window = self.board.get_negative_diagonal(r + constants.CONNECT_N - 1, c, set())
-                temp_score += self.evaluate_window(window, piece)
-        return int(temp_score)
-
-    def make_move(self, row: int, col: int, board: components.Board, with_display: bool = True) -> components.Node:
-        """Make move that fills node with coordinate (row, col) with player.name"""
-        node_to_occupy = board.nodes[(row, col)]
-        node_to_occupy.fill = self.name
-        if with_display:
-            node_to_occupy.draw(board.screen, node_to_occupy.rect.center, constants.RAD, self.color)
-        return node_to_occupy
+        return self._score_windows(cells, piece, constants.TOP_LEFT)
 
+    @profiling.profiled('pick_best_move')
+    @memory.traced('pick_best_move')
     def pick_best_move(self, piece: int) -> int:
         """Choose the best, highest-score possible move (column).
         """
+        if self.controller is not None:
+            return self._search_move()
         valid_locations = self.board.get_valid_locations()
         best_score = -10000
-        best_col = random.choice(valid_locations)
-        screen = self.board.screen
-        self.board.screen = None
+        best_col = self.rng.choice(valid_locations)
         for col in valid_locations:
             row = self.board.get_next_open_row(col)
-            temp_board = deepcopy(self.board)
-            self.board, self.temp_board = temp_board, self.board
-            self.make_move(row, col, self.board, with_display=False)
+            test_node = self.make_move(row, col, self.board)
             score = self.score_position(piece)
+            test_node.fill = constants.EMPTY
             if score > best_score:
                 best_score = score
                 best_col = col
-            self.board, self.temp_board = self.temp_board, None
-        self.board.screen = screen
 
         return best_col
 
+    def _search_move(self) -> int:
+        """Search the current position with the engine at self.controller's level, report the time taken to
+        self.controller and return the chosen column"""
+        position = self.board_position()
+        start = time.perf_counter()
+        col = latency.move_at_level(self.searcher, position, self.controller.level)
+        self.controller.record(time.perf_counter() - start)
+        return col
+
+    def board_position(self) -> engine.Position:
+        """Return the position on self.board as an engine Position"""
+        cells = self.board.get_cells()
+        grid = [cells[row * self.board.cols:(row + 1) * self.board.cols] for row in range(self.board.rows)]
+        return engine.Position.from_grid(grid, self.config.connect_n)
+
     def evaluate_window(self, window: list[int], piece: int) -> int:
         """Evaluate the current situation (i.e. after the AI piece is placed on its copy board)
         of the window of length CONNECT_N by applying the following rules:
-         - If the number of self's pieces == CONNECT_N, then increase the score to 1000000—i.e. this is THE move to win.
+         - If the number of self's pieces == CONNECT_N, then increase the score by self.weights.own[0] (1000 by
+           default)—i.e. this is THE move to win.
          - elif the number of self's pieces == CONNECT_N - 1 and there still has one empty slot,
-           then increase the score by 40, etc.
+           then increase the score by self.weights.own[1] (40 by default), etc.
 
         For the opponent's pieces, AIPlayer does not want it to have long connected sequences. So,
         - if the number of opp_piece is CONNECT_N - 1 and there is an empty slot, then it means that after self's move
         to this piece's location on the copy board, the opponent will win.
-        This means that AIPlayer does NOT want to move there. So, in that case, decrease the score by 800
+        This means that AIPlayer does NOT want to move there. So, in that case, add self.weights.opp[0] (-800 by
+        default) to the score
         - elif ... the rest of the code follows the same logic as above
 
         Preconditions:
-        - len(window) == CONNECT_N
-        - piece == PLAYER2
+        - len(window) == self.config.connect_n
+        - piece in {PLAYER1, PLAYER2}
         """
         score = 0
-        opp_piece = constants.PLAYER1
-
-        if window.count(piece) == constants.CONNECT_N:
-            score += 1000
-        elif window.count(piece) == constants.CONNECT_N - 1 and window.count(constants.EMPTY) == 1:
-            score += 40
-        elif window.count(piece) == constants.CONNECT_N - 2 and window.count(constants.EMPTY) == 2:
-            score += 10
+        opp_piece = engine.other_player(piece)
+        connect_n = self.config.connect_n
+
+        if window.count(piece) == connect_n:
+            score += self.weights.own[0]
+        elif window.count(piece) == connect_n - 1 and window.count(constants.EMPTY) == 1:
+            score += self.weights.own[1]
+        elif window.count(piece) == connect_n - 2 and window.count(constants.EMPTY) == 2:
+            score += self.weights.own[2]
         else:
-            score += 1
-
-        if window.count(opp_piece) == constants.CONNECT_N - 1 and window.count(constants.EMPTY) == 1:
-            score -= 800
-        elif window.count(opp_piece) == constants.CONNECT_N - 2 and window.count(constants.EMPTY) == 2:
-            score -= 400
-        elif window.count(opp_piece) == constants.CONNECT_N - 3 and window.count(constants.EMPTY) == 3:
-            score -= 10
+            score += self.weights.own[3]
+
+        if window.count(opp_piece) == connect_n - 1 and window.count(constants.EMPTY) == 1:
+            score += self.weights.opp[0]
+        elif window.count(opp_piece) == connect_n - 2 and window.count(constants.EMPTY) == 2:
+            score += self.weights.opp[1]
+        elif window.count(opp_piece) == connect_n - 3 and window.count(constants.EMPTY) == 3:
+            score += self.weights.opp[2]
         else:
-            score -= 1
+            score += self.weights.opp[3]
 
         return int(score)
 
@@ -225,18 +261,23 @@ class AIPlayer(Player):
 class EasyAIPlayer(AIPlayer):
     """Easy AI Player that just chooses a random valid move every turn"""
 
+    @profiling.profiled('pick_best_move')
     def pick_best_move(self, piece: int) -> int:
         """Pick a "best"—random and valid—move and return its column"""
         valid_moves = self.board.get_valid_locations()
-        return random.choice(valid_moves)
+        return self.rng.choice(valid_moves)
+
+
+# The evaluation cache gets most of the memory budget; every AIPlayer's search state is registered on creation
+memory.BUDGET.register('eval_cache', AIPlayer.evaluation_cache, share=4)
 
 
 if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['constants', 'components', 'random', 'copy', 'typing'],  # the names (strs)
-        # of imported modules
+        'extra-imports': ['cache', 'constants', 'config', 'engine', 'latency', 'memory', 'profiling', 'weights',
+                          'components', 'random', 'time', 'typing'],  # the names (strs) of imported modules
         'allowed-io': [],  # the names (strs) of functions that call print/open/input
         'max-line-length': 120
     })
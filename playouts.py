@@ -0,0 +1,224 @@
+"""This Python module contains the random playout simulator of Connect N project.
+
+It plays thousands of random games (both players pick uniformly among the playable columns, like
+EasyAIPlayer) from a start position, without a Board or pygame, and reports for every first move how often
+the player to move wins, loses or draws and how long the games last. Each playout runs in a tight loop over
+plain bitboard integers, so it is a cheap rollout backend and a sanity benchmark of game length against board
+size:
+
+    python playouts.py --rows 6 --cols 7 --connect-n 4 --moves 33 --games 20000 --workers 4
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from functools import lru_cache
+import multiprocessing
+import random
+from typing import Optional
+
+import constants
+from config import DEFAULT_CONFIG, GameConfig
+import engine
+import profiling
+import snapshot
+
+# The playouts of each first move are split into jobs of this many games, each with its own seeded generator,
+# so the results do not depend on the number of workers
+GAMES_PER_JOB = 1000
+
+
+@dataclass
+class MoveStats:
+    """The results of the random playouts after one first move, from the point of view of the player who made it.
+
+    Instance Attributes:
+    - games: the number of games played
+    - wins: the number of games won by the player who made the first move
+    - losses: the number of games lost by that player
+    - draws: the number of drawn games
+    - plies: the total number of moves played in these games, the first move included
+    """
+    games: int = 0
+    wins: int = 0
+    losses: int = 0
+    draws: int = 0
+    plies: int = 0
+
+    @property
+    def win_rate(self) -> float:
+        """The fraction of games won, counting draws as half a win"""
+        return (self.wins + self.draws / 2) / self.games if self.games else 0.0
+
+    @property
+    def mean_length(self) -> float:
+        """The mean number of moves per game"""
+        return self.plies / self.games if self.games else 0.0
+
+    def add(self, other: MoveStats) -> None:
+        """Add the results in other to these results"""
+        self.games += other.games
+        self.wins += other.wins
+        self.losses += other.losses
+        self.draws += other.draws
+        self.plies += other.plies
+
+
+@lru_cache(maxsize=constants.SHAPE_CACHE_SIZE)
+def line_steps(rows: int, connect_n: int) -> tuple[tuple[int, ...], ...]:
+    """Return, for each line direction, the shifts that reduce a bitboard to the cells starting a line of
+    connect_n: after b &= b >> shift for every shift in turn, bit p is set iff p starts a line.
+
+    The lengths covered double at every step, so a direction takes about log2(connect_n) steps instead of
+    connect_n - 1."""
+    height = rows + 1
+    steps = []
+    for shift in (1, height, height + 1, height - 1):
+        direction_steps, covered = [], 1
+        while covered < connect_n:
+            step = min(covered, connect_n - covered)
+            direction_steps.append(step * shift)
+            covered += step
+        steps.append(tuple(direction_steps))
+    return tuple(steps)
+
+
+def random_playout(position: engine.Position, rng: random.Random) -> tuple[int, int]:
+    """Play random moves from position until the game ends and return (the winner, the number of moves played);
+    the winner is EMPTY for a draw. position is left unchanged.
+
+    Preconditions:
+    - not position.is_terminal()
+    """
+    rows, height = position.rows, position.rows + 1
+    steps = line_steps(rows, position.connect_n)
+    boards = position.bitboards.copy()
+    heights = position.heights.copy()
+    open_cols = [col for col in range(position.cols) if heights[col] < rows]
+    turn, other = position.turn, engine.other_player(position.turn)
+    random_float = rng.random
+    plies = 0
+    while open_cols:
+        i = int(random_float() * len(open_cols))
+        col = open_cols[i]
+        board = boards[turn] | 1 << (col * height + heights[col])
+        boards[turn] = board
+        heights[col] += 1
+        if heights[col] == rows:
+            open_cols[i] = open_cols[-1]
+            open_cols.pop()
+        plies += 1
+        for direction_steps in steps:
+            line = board
+            for shift in direction_steps:
+                line &= line >> shift
+                if not line:
+                    break
+            if line:
+                return turn, plies
+        turn, other = other, turn
+    return constants.EMPTY, plies
+
+
+def playout_first_move(position: engine.Position, col: int, games: int, rng: random.Random) -> MoveStats:
+    """Play col in a copy of position, then games random playouts, and return their results for the player
+    to move in position"""
+    player = position.turn
+    after = position.copy()
+    after.play(col)
+    if after.has_won(player):
+        return MoveStats(games, wins=games, plies=games)
+    if after.is_full():
+        return MoveStats(games, draws=games, plies=games)
+    stats = MoveStats(games)
+    for _ in range(games):
+        winner, plies = random_playout(after, rng)
+        stats.plies += plies + 1
+        if winner == player:
+            stats.wins += 1
+        elif winner == constants.EMPTY:
+            stats.draws += 1
+        else:
+            stats.losses += 1
+    return stats
+
+
+def _playout_job(job: tuple[bytes, int, int, int, str]) -> tuple[int, MoveStats]:
+    """Run one job of simulate in a worker process and return (its first move, its results)"""
+    position_data, col, games, job_index, seed = job
+    position = snapshot.decode_position(position_data)
+    return col, playout_first_move(position, col, games, random.Random(f'{seed}:{col}:{job_index}'))
+
+
+@profiling.profiled('simulate')
+def simulate(position: engine.Position, games: int, seed: int | str = 0,
+             workers: Optional[int] = 1) -> dict[int, MoveStats]:
+    """Play games random playouts after every playable first move in position and return the results by
+    first move, for the player to move in position.
+
+    The playouts are split into jobs of GAMES_PER_JOB games, each with a generator seeded with (seed, first move,
+    job), so the same arguments give the same results whatever the number of workers. With workers=1 the jobs
+    run in this process; otherwise they run in a pool of workers processes (one per CPU if workers is None).
+
+    Preconditions:
+    - not position.is_terminal()
+    - games >= 1
+    """
+    position_data = snapshot.encode_position(position)
+    jobs = [(position_data, col, min(GAMES_PER_JOB, games - start), start // GAMES_PER_JOB, str(seed))
+            for col in position.valid_moves() for start in range(0, games, GAMES_PER_JOB)]
+    results = {col: MoveStats() for col in position.valid_moves()}
+    if workers == 1:
+        outcomes = map(_playout_job, jobs)
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            outcomes = pool.map(_playout_job, jobs)
+    for col, stats in outcomes:
+        results[col].add(stats)
+    return results
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run random playouts from a position and print the results of every first move"""
+    parser = argparse.ArgumentParser(description='Simulate random Connect N games from a position.')
+    parser.add_argument('--rows', type=int, default=DEFAULT_CONFIG.rows)
+    parser.add_argument('--cols', type=int, default=DEFAULT_CONFIG.cols)
+    parser.add_argument('--connect-n', type=int, default=DEFAULT_CONFIG.connect_n)
+    parser.add_argument('--moves', default='', help='the moves leading to the start position (see analysis.py)')
+    parser.add_argument('--games', type=int, default=10_000, help='number of playouts per first move')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1)
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.configure_from_args(args)
+
+    position = engine.Position.from_moves(args.moves, GameConfig(args.rows, args.cols, args.connect_n))
+    if position.is_terminal():
+        parser.error('the game is already over in this position')
+    print(f'{"move":>4} {"wins":>7} {"losses":>7} {"draws":>7} {"score":>6} {"length":>6}')
+    for col, stats in simulate(position, args.games, args.seed, args.workers).items():
+        print(f'{col:>4} {stats.wins:>7} {stats.losses:>7} {stats.draws:>7} {stats.win_rate:>6.3f} '
+              f'{stats.mean_length:>6.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""This Python module contains the opt-in profiling hooks of Connect N project.
+
+Profiling is off unless the CONNECTN_PROFILE environment variable (or the --profile flag of main.py and the
+headless runners) names a directory. Then every AI move, every processed player input and every slow frame of
+the game loop writes its own profile to that directory, named after what was profiled, the process id, a
+sequence number and the duration, e.g. 'pick_best_move-4242-00007-1834ms.prof'.
+
+CONNECTN_PROFILE_FORMAT selects the output format:
+ - 'pstats' (default): cProfile statistics, to open with pstats or snakeviz;
+ - 'collapsed': sampled stacks in the collapsed format read by flamegraph.pl and speedscope.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+import argparse
+from collections import Counter
+from contextlib import contextmanager
+import cProfile
+import functools
+import itertools
+import os
+import sys
+import threading
+import time
+from types import FrameType
+from typing import Any, Callable, Iterator, Optional
+
+PROFILE_ENV = 'CONNECTN_PROFILE'
+FORMAT_ENV = 'CONNECTN_PROFILE_FORMAT'
+FORMATS = ('pstats', 'collapsed')
+SAMPLE_INTERVAL = 0.001
+# Frames of the game loop are only saved when they take longer than this (i.e. when they drop below 30 FPS)
+SLOW_FRAME_MS = 1000 / 30
+
+_sequence = itertools.count(1)
+_active = threading.local()
+
+
+def configure(directory: Optional[str], profile_format: str = 'pstats') -> None:
+    """Turn profiling on, writing profiles to directory in profile_format, or off if directory is None.
+    The settings are stored in the environment so that worker processes started afterwards inherit them."""
+    if directory is None:
+        os.environ.pop(PROFILE_ENV, None)
+        return
+    if profile_format not in FORMATS:
+        raise ValueError(f'Unknown profile format {profile_format!r}; expected one of {FORMATS}')
+    os.makedirs(directory, exist_ok=True)
+    os.environ[PROFILE_ENV] = directory
+    os.environ[FORMAT_ENV] = profile_format
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --profile and --profile-format options to the command line parser of a runner"""
+    parser.add_argument('--profile', metavar='DIR', default=None,
+                        help=f'write a profile of every AI move to DIR (also enabled by {PROFILE_ENV})')
+    parser.add_argument('--profile-format', choices=FORMATS, default=os.environ.get(FORMAT_ENV, 'pstats'))
+
+
+def configure_from_args(args: argparse.Namespace) -> None:
+    """Turn profiling on if the --profile option added by add_arguments was given"""
+    if args.profile is not None:
+        configure(args.profile, args.profile_format)
+
+
+def profile_directory() -> Optional[str]:
+    """Return the directory profiles are written to, or None if profiling is off"""
+    return os.environ.get(PROFILE_ENV) or None
+
+
+class _StackSampler:
+    """Samples the stack of one thread from a background thread and counts the collapsed stacks.
+
+    Instance Attributes:
+    - thread_id: the id of the sampled thread
+    - stacks: the number of samples of each collapsed stack ('outer;...;inner')
+    - paused: whether sampling is paused (while a nested profile is active)
+    """
+    thread_id: int
+    stacks: Counter[str]
+    paused: bool
+    _stop: threading.Event
+    _thread: threading.Thread
+
+    def __init__(self, thread_id: int) -> None:
+        """Initialization of _StackSampler class"""
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.paused = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def enable(self) -> None:
+        """Start or resume sampling"""
+        self.paused = False
+        if not self._thread.is_alive():
+            self._thread.start()
+
+    def disable(self) -> None:
+        """Pause sampling"""
+        self.paused = True
+
+    def stop(self) -> None:
+        """Stop sampling for good"""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Take a sample every SAMPLE_INTERVAL seconds until stopped"""
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None and not self.paused:
+                self.stacks[_collapse(frame)] += 1
+
+    def write(self, path: str) -> None:
+        """Write the collapsed stacks to path, one 'stack count' line each"""
+        with open(path, 'w') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f'{stack} {count}\n')
+
+
+def _collapse(frame: Optional[FrameType]) -> str:
+    """Return the stack ending at frame in collapsed form: 'module:function' entries from outermost to innermost"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+@contextmanager
+def profile(label: str, min_ms: float = 0.0) -> Iterator[None]:
+    """Profile the body of the with statement and save it as one profile labelled label, if profiling is on and
+    the body took at least min_ms milliseconds.
+
+    Profiles may be nested; the outer profile is paused while an inner one runs, so each profile (and the duration
+    compared with min_ms) only covers its own work."""
+    directory = profile_directory()
+    if directory is None:
+        yield
+        return
+
+    if os.environ.get(FORMAT_ENV) == 'collapsed':
+        profiler = _StackSampler(threading.get_ident())
+    else:
+        profiler = cProfile.Profile()
+    # Each entry of the stack is [profiler, seconds spent in profiles nested in it]
+    stack = getattr(_active, 'stack', None)
+    if stack is None:
+        stack = _active.stack = []
+    if stack:
+        stack[-1][0].disable()
+    stack.append([profiler, 0.0])
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        own_ms = 1000 * (elapsed - stack.pop()[1])
+        if stack:
+            stack[-1][1] += elapsed
+            stack[-1][0].enable()
+        if isinstance(profiler, _StackSampler):
+            profiler.stop()
+        if own_ms >= min_ms:
+            _save(profiler, directory, label, own_ms)
+
+
+def _save(profiler: cProfile.Profile | _StackSampler, directory: str, label: str, elapsed_ms: float) -> None:
+    """Write the results of profiler to a new file in directory"""
+    os.makedirs(directory, exist_ok=True)
+    name = f'{label}-{os.getpid()}-{next(_sequence):05d}-{elapsed_ms:.0f}ms'
+    if isinstance(profiler, _StackSampler):
+        profiler.write(os.path.join(directory, name + '.collapsed'))
+    else:
+        profiler.dump_stats(os.path.join(directory, name + '.prof'))
+
+
+def profiled(label: str) -> Callable[[Callable], Callable]:
+    """Return a decorator that profiles every call of the decorated function as described in profile"""
+    def decorator(function: Callable) -> Callable:
+        """Wrap function in profile(label)"""
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            """Call the wrapped function inside profile(label)"""
+            with profile(label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['argparse', 'collections', 'contextlib', 'cProfile', 'functools', 'itertools', 'os', 'sys',
+                          'threading', 'time', 'types', 'typing'],  # the names (strs) of imported modules
+        'allowed-io': ['_StackSampler.write'],  # the names (strs) of functions that call print/open/input
+        'disable': ['W0212'],
+        'max-line-length': 120
+    })
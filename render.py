@@ -0,0 +1,245 @@
+"""This Python module contains the render pipeline of the Connect N game window.
+
+The game logic fills a node as soon as a move is made (see Player.make_move); the Renderer only shows it. It
+keeps its own copy of the fills on screen, drops every new piece from the header into its cell, and rings the
+winning line once the last piece has landed:
+
+    renderer = Renderer(board)
+    renderer.drop(node, player.color)
+    while renderer.busy:
+        renderer.tick()
+
+The animations advance in fixed steps of STEP seconds, whatever the frame rate, so they look the same on slow
+and fast machines; tick caps the frame rate at FRAME_RATE with pygame.time.Clock and only updates the parts of
+the window that changed. Since the game state does not wait for the animation, the AI can think while a piece
+is still falling.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+from typing import Optional, TYPE_CHECKING
+
+import pygame
+
+import constants
+from components import FILL_COLORS
+
+if TYPE_CHECKING:
+    import components
+
+FRAME_RATE = 60
+# The animations advance in steps of this many seconds
+STEP = 1 / 120
+# A frame never advances the animations by more than this many seconds, e.g. after the window was dragged
+MAX_FRAME_TIME = 0.25
+# The acceleration of a falling piece, in squares per second squared
+GRAVITY = 40.0
+HIGHLIGHT_COLOR = constants.LIGHT_BLUE
+
+
+class DropAnimation:
+    """A piece falling down a column into its node.
+
+    Instance Attributes:
+    - node: the node the piece falls into
+    - color: the color of the piece
+    - y: the current y coordinate of the center of the piece, in pixels
+    - velocity: the current speed of the piece, in pixels per second
+    - target_y: the y coordinate of the center of node, where the piece stops
+    - rect: the area of the screen where the piece was last drawn, or None before it is drawn
+    """
+    node: components.Node
+    color: tuple[int, int, int]
+    y: float
+    velocity: float
+    target_y: int
+    rect: Optional[pygame.Rect]
+
+    def __init__(self, node: components.Node, color: tuple[int, int, int], start_y: int) -> None:
+        """Initialization of DropAnimation class"""
+        self.node = node
+        self.color = color
+        self.y = start_y
+        self.velocity = 0.0
+        self.target_y = node.rect.centery
+        self.rect = None
+
+    @property
+    def landed(self) -> bool:
+        """Whether the piece has reached its node"""
+        return self.y >= self.target_y
+
+    def step(self, seconds: float, gravity: float) -> None:
+        """Let the piece fall for the given number of seconds under gravity (in pixels per second squared)"""
+        self.velocity += gravity * seconds
+        self.y = min(self.y + self.velocity * seconds, self.target_y)
+
+
+class Renderer:
+    """Draws a Board's moves on its screen with animations, independently of the game state.
+
+    Instance Attributes:
+    - board: the board drawn by this Renderer
+    - clock: the pygame clock capping the frame rate
+    - frame_rate: the maximum number of frames per second
+    - drops: the pieces currently falling, oldest first
+    - shown: maps every node to the fill currently drawn for it; a node whose piece is still falling is shown
+      empty
+    - winning_line: the nodes to ring once every piece has landed
+    - dirty: the areas of the screen drawn since the last update of the window
+    - highlighted: whether the winning line has been drawn
+
+    Representation Invariants:
+    - self.frame_rate > 0
+    """
+    board: components.Board
+    clock: pygame.time.Clock
+    frame_rate: int
+    drops: list[DropAnimation]
+    shown: dict[components.Node, int]
+    winning_line: list[components.Node]
+    dirty: list[pygame.Rect]
+    highlighted: bool
+    _lag: float
+
+    def __init__(self, board: components.Board, frame_rate: int = FRAME_RATE) -> None:
+        """Initialization of Renderer class. board must already be drawn on its screen."""
+        self.board = board
+        self.clock = pygame.time.Clock()
+        self.frame_rate = frame_rate
+        self.drops = []
+        self.shown = {node: node.fill for node in board.nodes}
+        self.winning_line = []
+        self.dirty = []
+        self.highlighted = False
+        self._lag = 0.0
+
+    @property
+    def busy(self) -> bool:
+        """Whether a piece is still falling or the winning line is still to be drawn"""
+        return bool(self.drops) or (bool(self.winning_line) and not self.highlighted)
+
+    def drop(self, node: components.Node, color: tuple[int, int, int]) -> None:
+        """Start dropping a piece of the given color into node. node is shown empty until the piece lands."""
+        self.shown[node] = constants.EMPTY
+        self.drops.append(DropAnimation(node, color, self.board.config.radius))
+
+    def highlight(self, coordinates: list[tuple[int, int]]) -> None:
+        """Ring the nodes at coordinates once every piece has landed"""
+        self.winning_line = [self.board.node_at(row, col) for row, col in coordinates]
+        self.highlighted = False
+
+    def header_rect(self) -> pygame.Rect:
+        """Return the area of the header bar, above the board"""
+        return pygame.Rect(0, 0, self.board.width, self.board.config.square_size)
+
+    def invalidate(self, rect: pygame.Rect) -> None:
+        """Update rect, drawn by someone else (e.g. the header drawn by the Game), on the next frame"""
+        self.dirty.append(rect)
+
+    def tick(self) -> float:
+        """Wait for the next frame, advance the animations to it, redraw what changed and update those areas of
+        the window. Return the number of seconds since the previous frame."""
+        elapsed = self.clock.tick(self.frame_rate) / 1000
+        self._lag = min(self._lag + elapsed, MAX_FRAME_TIME)
+        gravity = GRAVITY * self.board.config.square_size
+        while self._lag >= STEP:
+            for animation in self.drops:
+                animation.step(STEP, gravity)
+            self._lag -= STEP
+
+        # Erase every falling piece before drawing any, so pieces falling down the same column do not erase
+        # each other
+        for animation in self.drops:
+            if animation.rect is not None:
+                self._redraw_column(animation.node.col, animation.rect)
+        for animation in self.drops:
+            self._draw_drop(animation)
+        for animation in [animation for animation in self.drops if animation.landed]:
+            self.drops.remove(animation)
+            self._land(animation)
+        if self.winning_line and not self.drops and not self.highlighted:
+            self._draw_highlight()
+
+        if self.dirty:
+            pygame.display.update(self.dirty)
+            self.dirty = []
+        return elapsed
+
+    def finish(self) -> None:
+        """Run frames until every piece has landed and the winning line is drawn"""
+        while self.busy:
+            pygame.event.pump()
+            self.tick()
+
+    def _draw_drop(self, animation: DropAnimation) -> None:
+        """Draw the piece of animation at its current position"""
+        center = (animation.node.rect.centerx, int(animation.y))
+        animation.rect = pygame.draw.circle(self.board.screen, animation.color, center, self.board.config.radius)
+        self.dirty.append(animation.rect)
+
+    def _land(self, animation: DropAnimation) -> None:
+        """Show the piece of animation in its node"""
+        node = animation.node
+        self._redraw_column(node.col, animation.rect)
+        self.shown[node] = node.fill
+        self._draw_node(node)
+
+    def _redraw_column(self, col: int, area: pygame.Rect) -> None:
+        """Redraw the background and the nodes of column col within area, as they are shown"""
+        screen = self.board.screen
+        square_size = self.board.config.square_size
+        header = self.header_rect().clip(area)
+        if header.height:
+            pygame.draw.rect(screen, constants.BLACK, header)
+        board_area = pygame.Rect(0, square_size, self.board.width, self.board.height - square_size).clip(area)
+        if board_area.height:
+            pygame.draw.rect(screen, constants.BLUE, board_area)
+            for row in range(self.board.rows):
+                node = self.board.node_at(row, col)
+                if node.rect.colliderect(board_area):
+                    self._draw_node(node)
+        self.dirty.append(area)
+
+    def _draw_node(self, node: components.Node) -> None:
+        """Draw node with the fill it is shown with"""
+        pygame.draw.circle(self.board.screen, FILL_COLORS[self.shown[node]], node.rect.center,
+                           self.board.config.radius)
+        self.dirty.append(node.rect)
+
+    def _draw_highlight(self) -> None:
+        """Ring every node of the winning line"""
+        width = max(2, self.board.config.radius // 6)
+        for node in self.winning_line:
+            pygame.draw.circle(self.board.screen, HIGHLIGHT_COLOR, node.rect.center, self.board.config.radius, width)
+            self.dirty.append(node.rect)
+        self.highlighted = True
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['constants', 'components', 'pygame', 'typing'],  # the names (strs) of imported modules
+        'allowed-io': [],  # the names (strs) of functions that call print/open/input
+        'disable': ['E1101'],
+        'max-line-length': 120
+    })
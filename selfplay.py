@@ -0,0 +1,187 @@
+"""This Python module contains the self-play data generation pipeline of Connect N project.
+
+It plays engine-vs-engine games headless, in parallel worker processes, and streams one record per searched
+position to sharded, gzip-compressed JSON-lines files. tuner.py reads these shards to fit the evaluation weights.
+
+    python selfplay.py data/ --games 2000 --rows 6 --cols 7 --connect-n 4 --depth 4 --workers 4
+
+Each record holds the board shape, the moves leading to the position (see engine.format_moves), the player to
+move, the search score for that player and the outcome of the game for that player (1 win, 0.5 draw, 0 loss).
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+import argparse
+from functools import partial
+import glob
+import gzip
+import json
+import multiprocessing
+import os
+import random
+from typing import Any, Iterator, Optional, TextIO
+
+from config import DEFAULT_CONFIG, GameConfig
+import engine
+import profiling
+from weights import DEFAULT_WEIGHTS, EvalWeights
+
+RECORDS_PER_SHARD = 50_000
+SHARD_PATTERN = 'selfplay-*.jsonl.gz'
+
+
+def play_game(game_index: int, game_config: GameConfig, depth: int, random_plies: int, seed: int,
+              eval_weights: EvalWeights = DEFAULT_WEIGHTS) -> list[dict[str, Any]]:
+    """Play one self-play game and return its records.
+
+    The first random_plies moves are random, so the games cover different openings; the random choices come from
+    a generator seeded with (seed, game_index), so the same arguments always produce the same game.
+    """
+    rng = random.Random(f'{seed}:{game_index}')
+    position = engine.Position(game_config)
+    searcher = engine.Searcher(depth, weights=eval_weights)
+    searched = []
+    while not position.is_terminal():
+        if len(position.moves) < random_plies:
+            position.play(rng.choice(position.valid_moves()))
+            continue
+        result = searcher.search(position)
+        searched.append((engine.format_moves(position.moves), position.turn, result.score))
+        position.play(result.best_move)
+
+    winner = engine.other_player(position.turn) if position.has_won(engine.other_player(position.turn)) else None
+    records = []
+    for moves, turn, score in searched:
+        outcome = 0.5 if winner is None else float(winner == turn)
+        records.append({'rows': game_config.rows, 'cols': game_config.cols, 'connect_n': game_config.connect_n,
+                        'moves': moves, 'turn': turn, 'score': score, 'outcome': outcome})
+    return records
+
+
+class ShardWriter:
+    """Writes records to numbered, gzip-compressed JSON-lines shard files in a directory, starting a new shard
+    every records_per_shard records.
+
+    Instance Attributes:
+    - directory: the directory holding the shards
+    - records_per_shard: the maximum number of records in one shard
+    - shards_written: the number of shards started so far
+    - records_written: the number of records written so far
+    """
+    directory: str
+    records_per_shard: int
+    shards_written: int
+    records_written: int
+    _file: Optional[TextIO]
+    _records_in_shard: int
+    _first_shard: int
+
+    def __init__(self, directory: str, records_per_shard: int = RECORDS_PER_SHARD) -> None:
+        """Initialization of ShardWriter class. Shards already in directory are kept; new shards are numbered
+        after them."""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.records_per_shard = records_per_shard
+        self.shards_written = 0
+        self.records_written = 0
+        self._file = None
+        self._records_in_shard = 0
+        self._first_shard = len(glob.glob(os.path.join(directory, SHARD_PATTERN)))
+
+    def write(self, record: dict[str, Any]) -> None:
+        """Append record to the current shard, starting a new shard first if the current one is full"""
+        if self._file is None or self._records_in_shard >= self.records_per_shard:
+            self.close()
+            name = f'selfplay-{self._first_shard + self.shards_written:05d}.jsonl.gz'
+            self._file = gzip.open(os.path.join(self.directory, name), 'wt')
+            self.shards_written += 1
+            self._records_in_shard = 0
+        self._file.write(json.dumps(record) + '\n')
+        self._records_in_shard += 1
+        self.records_written += 1
+
+    def close(self) -> None:
+        """Close the current shard, if any"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> ShardWriter:
+        """Return this ShardWriter for use in a with statement"""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close the current shard at the end of a with statement"""
+        self.close()
+
+
+def generate(directory: str, games: int, game_config: GameConfig = DEFAULT_CONFIG, depth: int = 4,
+             random_plies: int = 4, seed: int = 0, workers: Optional[int] = None,
+             eval_weights: EvalWeights = DEFAULT_WEIGHTS) -> int:
+    """Play games self-play games in a pool of workers processes and stream their records to shards in directory
+    as the games finish. Return the number of records written."""
+    job = partial(play_game, game_config=game_config, depth=depth, random_plies=random_plies, seed=seed,
+                  eval_weights=eval_weights)
+    with ShardWriter(directory) as writer, multiprocessing.Pool(workers) as pool:
+        for records in pool.imap_unordered(job, range(games), chunksize=4):
+            for record in records:
+                writer.write(record)
+        return writer.records_written
+
+
+def read_shards(directory: str) -> Iterator[dict[str, Any]]:
+    """Yield every record of every shard in directory, one at a time, without loading a whole shard in memory"""
+    for path in sorted(glob.glob(os.path.join(directory, SHARD_PATTERN))):
+        with gzip.open(path, 'rt') as file:
+            for line in file:
+                yield json.loads(line)
+
+
+def record_position(record: dict[str, Any]) -> engine.Position:
+    """Return the position of a self-play record"""
+    game_config = GameConfig(record['rows'], record['cols'], record['connect_n'])
+    return engine.Position.from_moves(record['moves'], game_config)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Parse the command line and generate self-play shards"""
+    parser = argparse.ArgumentParser(description='Generate Connect N self-play records for weight tuning.')
+    parser.add_argument('directory', help='directory to write the shards to')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--rows', type=int, default=DEFAULT_CONFIG.rows)
+    parser.add_argument('--cols', type=int, default=DEFAULT_CONFIG.cols)
+    parser.add_argument('--connect-n', type=int, default=DEFAULT_CONFIG.connect_n)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--random-plies', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.configure_from_args(args)
+
+    game_config = GameConfig(args.rows, args.cols, args.connect_n)
+    written = generate(args.directory, args.games, game_config, args.depth, args.random_plies, args.seed,
+                       args.workers)
+    print(f'Wrote {written} records to {args.directory}')
+
+
+if __name__ == '__main__':
+    main()
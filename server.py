@@ -0,0 +1,389 @@
+"""This Python module contains the multi-game server of Connect N project.
+
+The server hosts many independent, headless games in one process. Clients talk to it over local TCP or a
+UNIX socket with one JSON object per line; every request gets exactly one JSON response line:
+
+    {"op": "new", "rows": 6, "cols": 7, "connect_n": 4, "ai": "hard", "depth": 4, "seed": 7}
+                                                (seed is optional; it makes the easy AI's moves reproducible)
+    {"op": "new", "ai": "hard", "target_ms": 200}   (the hard AI adapts its depth to keep 95% of moves under 200 ms;
+                                                with a seed too, it stays at depth so its moves are reproducible)
+    {"op": "move", "session": 1, "col": 3}      (the AI replies in the same response when the session has one)
+    {"op": "ai_move", "session": 1}             (let the AI play for the player to move)
+    {"op": "state", "session": 1}
+    {"op": "close", "session": 1}
+    {"op": "stats"}                             (aggregate and per-session latency, adaptive AI levels, memory)
+
+AI searches run in a bounded pool of worker processes so a slow search never blocks the event loop. Boards are
+limited to MAX_BOARD_SIZE rows and columns, and searches to MAX_DEPTH plies.
+
+The sessions share the memory budget of the process (see memory.py). When they outgrow it, the least recently
+used idle sessions are closed, and requests on them get a "No session" error.
+
+    python server.py --port 8765 --workers 4 --memory-mb 256
+    python server.py --unix /tmp/connectn.sock
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+import itertools
+import json
+import random
+import time
+from typing import Any, Optional
+
+from config import DEFAULT_CONFIG, GameConfig
+import engine
+import latency
+from latency import LatencyStats
+import memory
+import profiling
+import snapshot
+
+AI_LEVELS = ('easy', 'hard')
+# The ops that act on an existing session, given by its id
+SESSION_OPS = ('state', 'close', 'move', 'ai_move')
+# The largest boards and deepest searches a client may ask for, like the GUI's board size prompt, so that one
+# request cannot hold a worker process for minutes
+MAX_BOARD_SIZE = 11
+MAX_DEPTH = 8
+# The approximate number of bytes a new Session takes (its position, random generator, lock, statistics, ...)
+SESSION_SIZE = 4608
+# The approximate number of bytes a latency sample or a move adds to a Session
+SAMPLE_SIZE = 32
+MOVE_SIZE = 8
+
+
+@memory.traced('search_best_move')
+def search_best_move(position_data: bytes, depth: int) -> tuple[Optional[int], float]:
+    """Return the engine's best move in the position encoded in position_data (see snapshot.encode_position),
+    searched to depth (see latency.move_at_level), together with the number of seconds the search took. This runs
+    in a worker process, so the position is shipped in its compact binary form, and the search is timed there so
+    that the time spent waiting for a free worker is not counted."""
+    position = snapshot.decode_position(position_data)
+    start = time.perf_counter()
+    col = latency.move_at_level(engine.Searcher(), position, depth)
+    return col, time.perf_counter() - start
+
+
+class Session:
+    """One headless game hosted by the GameServer.
+
+    Instance Attributes:
+    - session_id: the id clients use to address this session
+    - position: the current position of this session's game
+    - ai: the AI level ('easy' or 'hard') replying to every move, or None for a game between two clients
+    - depth: the search depth of the hard AI
+    - winner: the player who won this game, or None
+    - lock: serialises the requests on this session, so two clients cannot move at the same time
+    - latency: the latency statistics of the requests on this session
+    - rng: the random number generator of the easy AI
+    - controller: if not None, chooses the search depth of the hard AI instead of depth
+    - last_used: the time.monotonic() of the last request on this session
+    """
+    session_id: int
+    position: engine.Position
+    ai: Optional[str]
+    depth: int
+    winner: Optional[int]
+    lock: asyncio.Lock
+    latency: LatencyStats
+    rng: random.Random
+    controller: Optional[latency.DepthController]
+    last_used: float
+
+    def __init__(self, session_id: int, game_config: GameConfig, ai: Optional[str], depth: int,
+                 seed: Optional[int] = None, controller: Optional[latency.DepthController] = None) -> None:
+        """Initialization of Session class"""
+        self.session_id = session_id
+        self.position = engine.Position(game_config)
+        self.ai = ai
+        self.depth = depth
+        self.winner = None
+        self.lock = asyncio.Lock()
+        self.latency = LatencyStats()
+        self.rng = random.Random(seed)
+        self.controller = controller
+        self.last_used = time.monotonic()
+
+    @property
+    def game_over(self) -> bool:
+        """Whether this session's game has ended"""
+        return self.winner is not None or self.position.is_full()
+
+    def play(self, col: int) -> None:
+        """Play col for the player to move
+
+        Raise ValueError if the game is over or col is not playable.
+        """
+        if self.game_over:
+            raise ValueError('The game is over')
+        if not self.position.can_play(col):
+            raise ValueError(f'Column {col} is not playable')
+        mover = self.position.turn
+        self.position.play(col)
+        if self.position.has_won(mover):
+            self.winner = mover
+
+    def state(self) -> dict[str, Any]:
+        """Return the state of this session as a JSON-friendly dictionary"""
+        return {
+            'session': self.session_id,
+            'moves': engine.format_moves(self.position.moves),
+            'turn': self.position.turn,
+            'game_over': self.game_over,
+            'winner': self.winner
+        }
+
+    def memory_usage(self) -> int:
+        """Return the approximate number of bytes this session takes"""
+        return (SESSION_SIZE + SAMPLE_SIZE * len(self.latency.samples) + MOVE_SIZE * len(self.position.moves)
+                + (SAMPLE_SIZE * len(self.controller.moves.samples) if self.controller is not None else 0))
+
+
+class GameServer:
+    """An asyncio host of many concurrent, independent Sessions.
+
+    Instance Attributes:
+    - sessions: the open sessions by session id
+    - executor: the pool of worker processes running the hard AI's searches
+    - search_slots: bounds the number of searches submitted to executor at a time; further AI moves wait
+      here (without blocking the event loop) until a slot is free
+    - latency: the latency statistics of every request handled by this server
+    - max_bytes: if not None, the approximate number of bytes the sessions may take; beyond this, the least
+      recently used idle sessions are closed
+    - evicted: the number of sessions closed to stay under max_bytes
+    """
+    sessions: dict[int, Session]
+    executor: Executor
+    search_slots: asyncio.Semaphore
+    latency: LatencyStats
+    max_bytes: Optional[int]
+    evicted: int
+    _ids: itertools.count
+
+    def __init__(self, executor: Executor, max_pending_searches: int) -> None:
+        """Initialization of GameServer class"""
+        self.sessions = {}
+        self.executor = executor
+        self.search_slots = asyncio.Semaphore(max_pending_searches)
+        self.latency = LatencyStats()
+        self.max_bytes = None
+        self.evicted = 0
+        self._ids = itertools.count(1)
+        memory.BUDGET.register('sessions', self)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer the requests of one client connection, one JSON line at a time, until it disconnects"""
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                response = await self.handle_line(line)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_line(self, line: bytes) -> dict[str, Any]:
+        """Return the response to one request line. Errors, including unexpected ones, are reported in the
+        response instead of raised, so they never drop the client's connection."""
+        start = time.perf_counter()
+        session = None
+        try:
+            request = json.loads(line)
+            session = self.sessions.get(request.get('session'))
+            response = await self.handle_request(request)
+        except KeyError as error:
+            response = {'ok': False, 'error': f'Missing field {error}'}
+        except (ValueError, TypeError, AttributeError) as error:
+            response = {'ok': False, 'error': str(error)}
+        except Exception as error:  # e.g. a broken worker pool; the connection and the other sessions live on
+            response = {'ok': False, 'error': f'Internal error: {type(error).__name__}: {error}'}
+        elapsed = time.perf_counter() - start
+        self.latency.record(elapsed)
+        if session is not None:
+            session.latency.record(elapsed)
+        return response
+
+    async def handle_request(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Return the response to request
+
+        Raise ValueError, KeyError or TypeError if request is invalid.
+        """
+        op = request['op']
+        if op == 'new':
+            return {'ok': True, **self.new_session(request).state()}
+        if op == 'stats':
+            return {'ok': True, **self.stats()}
+        if op not in SESSION_OPS:
+            raise ValueError(f'Unknown op {op!r}')
+
+        session = self.get_session(request['session'])
+        session.last_used = time.monotonic()
+        async with session.lock:
+            if op == 'state':
+                return {'ok': True, **session.state()}
+            if op == 'close':
+                del self.sessions[session.session_id]
+                return {'ok': True, **session.state()}
+            if op == 'move':
+                session.play(int(request['col']))
+                response = {'ok': True}
+                if session.ai is not None and not session.game_over:
+                    response['ai_move'] = await self.play_ai_move(session)
+                return {**response, **session.state()}
+            ai_move = await self.play_ai_move(session)
+            return {'ok': True, 'ai_move': ai_move, **session.state()}
+
+    def new_session(self, request: dict[str, Any]) -> Session:
+        """Open and return a new session with the settings in request
+
+        Raise ValueError if a setting is invalid or above MAX_BOARD_SIZE or MAX_DEPTH.
+        """
+        game_config = GameConfig(int(request.get('rows', DEFAULT_CONFIG.rows)),
+                                 int(request.get('cols', DEFAULT_CONFIG.cols)),
+                                 int(request.get('connect_n', DEFAULT_CONFIG.connect_n)))
+        if max(game_config.rows, game_config.cols) > MAX_BOARD_SIZE:
+            raise ValueError(f'rows and cols must be at most {MAX_BOARD_SIZE}')
+        ai = request.get('ai')
+        if ai is not None and ai not in AI_LEVELS:
+            raise ValueError(f'ai must be one of {AI_LEVELS} or null')
+        depth = int(request.get('depth', 4))
+        if not 0 <= depth <= MAX_DEPTH:
+            raise ValueError(f'depth must be between 0 and {MAX_DEPTH}')
+        seed, target_ms = request.get('seed'), request.get('target_ms')
+        if target_ms is not None and not float(target_ms) > 0:
+            raise ValueError('target_ms must be positive')
+        if target_ms is None:
+            controller = None
+        elif seed is None:
+            controller = latency.DepthController(float(target_ms) / 1000, max_level=MAX_DEPTH)
+        else:  # an adapted depth would depend on the load of the machine
+            controller = latency.DepthController.pinned(depth, float(target_ms) / 1000)
+        session = Session(next(self._ids), game_config, ai, depth, None if seed is None else int(seed), controller)
+        self._evict_idle(self.max_bytes, keep=session)
+        self.sessions[session.session_id] = session
+        return session
+
+    def get_session(self, session_id: Any) -> Session:
+        """Return the open session with session_id
+
+        Raise ValueError if there is no such session.
+        """
+        if session_id not in self.sessions:
+            raise ValueError(f'No session {session_id!r}')
+        return self.sessions[session_id]
+
+    async def play_ai_move(self, session: Session) -> int:
+        """Let the session's AI (the hard AI if the session has none) play for the player to move and
+        return the column played. The hard AI's search runs in self.executor."""
+        if session.game_over:
+            raise ValueError('The game is over')
+        if session.ai == 'easy':
+            col = session.rng.choice(session.position.valid_moves())
+        else:
+            depth = session.depth if session.controller is None else session.controller.level
+            async with self.search_slots:
+                loop = asyncio.get_running_loop()
+                col, seconds = await loop.run_in_executor(self.executor, search_best_move,
+                                                          snapshot.encode_position(session.position), depth)
+                if session.controller is not None:
+                    session.controller.record(seconds)
+        session.play(col)
+        return col
+
+    def memory_usage(self) -> int:
+        """Return the approximate number of bytes the open sessions take"""
+        return sum(session.memory_usage() for session in self.sessions.values())
+
+    def set_memory_limit(self, max_bytes: Optional[int]) -> None:
+        """Keep the sessions under max_bytes (or unbounded if max_bytes is None), closing the least recently used
+        idle sessions now if needed"""
+        self.max_bytes = max_bytes
+        self._evict_idle(max_bytes)
+
+    def _evict_idle(self, max_bytes: Optional[int], keep: Optional[Session] = None) -> None:
+        """Close the least recently used sessions until the sessions and keep (a session about to be opened)
+        fit in max_bytes. Sessions with a request in progress are never closed."""
+        if max_bytes is None:
+            return
+        used = self.memory_usage() + (keep.memory_usage() if keep is not None else 0)
+        for session in sorted(self.sessions.values(), key=lambda candidate: candidate.last_used):
+            if used <= max_bytes:
+                break
+            if not session.lock.locked():
+                used -= session.memory_usage()
+                del self.sessions[session.session_id]
+                self.evicted += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Return the aggregate and per-session latency statistics and the memory usage of this process"""
+        return {
+            'sessions': len(self.sessions),
+            'evicted_sessions': self.evicted,
+            'latency': self.latency.summary(),
+            'session_latency': {session_id: session.latency.summary()
+                                for session_id, session in self.sessions.items()},
+            'ai_levels': {session_id: session.controller.state()
+                          for session_id, session in self.sessions.items() if session.controller is not None},
+            'memory': memory.BUDGET.report()
+        }
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765, unix_path: Optional[str] = None,
+                workers: Optional[int] = None, max_pending_searches: int = 64) -> None:
+    """Run a GameServer on host:port, or on the UNIX socket at unix_path if given, until cancelled"""
+    with ProcessPoolExecutor(workers) as executor:
+        game_server = GameServer(executor, max_pending_searches)
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(game_server.handle_client, unix_path)
+        else:
+            server = await asyncio.start_server(game_server.handle_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Parse the command line and run the server"""
+    parser = argparse.ArgumentParser(description='Host many concurrent Connect N games over JSON lines.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='listen on this UNIX socket path instead of TCP')
+    parser.add_argument('--workers', type=int, default=None, help='number of AI worker processes')
+    parser.add_argument('--max-pending-searches', type=int, default=64)
+    profiling.add_arguments(parser)
+    memory.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.configure_from_args(args)
+    memory.configure_from_args(args)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.max_pending_searches))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""This Python module contains the binary snapshot format of Connect N project.
+
+A snapshot holds everything needed to resume a game: the board shape, both players' bitboards (see
+engine.Position), the player to move, the kind of the second player and its AI settings, and optionally the
+AIs' evaluation cache. It takes a few dozen bytes without the cache (plus 2.5 kB for the random number
+generator of a seeded AI), and is written and read with struct, so saving and restoring a live game is instant
+and never touches the pygame objects of the Board.
+
+The position part can also be used on its own (encode_position / decode_position) to ship positions between
+processes without pickling Board and Node objects.
+
+Layout (all integers little-endian):
+ - header: magic b'CNSN', format version, flags, square size, second player kind, AI level, seed,
+   move time target and number of cache entries
+ - position: rows, cols, connect_n, turn, number of moves, then each player's bitboard in
+   ceil(cols * (rows + 1) / 8) bytes and one byte per move
+ - if the HAS_RNG_STATE flag is set: the state of the AI's random.Random, i.e. its 625 state words and its next
+   Gaussian (NaN for None)
+ - if there are cache entries: the 9 evaluation weights, then for every entry one byte per cell
+   (row-major, as in Board.get_cells), the evaluated piece and the score
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import math
+import os
+import struct
+from typing import Optional
+
+import constants
+from config import GameConfig
+import engine
+import latency
+from weights import DEFAULT_WEIGHTS, EvalWeights, NUM_WEIGHTS
+
+MAGIC = b'CNSN'
+VERSION = 1
+PLAYER_KINDS = ('human', 'easy', 'hard')
+HEADER = struct.Struct('<4sBBHBBqdI')
+POSITION_HEADER = struct.Struct('<BBBBH')
+WEIGHTS_FORMAT = struct.Struct(f'<{NUM_WEIGHTS}i')
+CACHE_ENTRY = struct.Struct('<Bi')
+HAS_SEED = 1
+HAS_AI_LEVEL = 2
+HAS_RNG_STATE = 4
+# The version and number of words of the state returned by random.Random.getstate
+RNG_VERSION = 3
+RNG_WORDS = 625
+RNG_STATE = struct.Struct(f'<{RNG_WORDS}Id')
+# rows, cols and connect_n take one byte each in the position header
+MAX_DIMENSION = 255
+# The seed takes a signed 64-bit integer in the header
+MIN_SEED = -2 ** 63
+MAX_SEED = 2 ** 63 - 1
+
+
+@dataclass
+class Snapshot:
+    """A suspended game.
+
+    Instance Attributes:
+    - position: the position of the game; its config also holds the board's square size
+    - player2: the kind of the second player, one of PLAYER_KINDS
+    - seed: the seed of the AI players, or None
+    - move_target: the move time target of the Hard Level AI, in seconds
+    - ai_level: the search level the Hard Level AI had reached, or None
+    - rng_state: the state (see random.Random.getstate) of the seeded AI player's random number generator, so
+      that a resumed game continues its random choices where they stopped, or None
+    - weights: the evaluation weights of the cached evaluations
+    - cache: the cached evaluations as (cells, piece, score), where cells is in the format of Board.get_cells
+
+    Representation Invariants:
+    - self.player2 in PLAYER_KINDS
+    """
+    position: engine.Position
+    player2: str = 'human'
+    seed: Optional[int] = None
+    move_target: float = latency.DEFAULT_MOVE_TARGET
+    ai_level: Optional[int] = None
+    rng_state: Optional[tuple] = None
+    weights: EvalWeights = DEFAULT_WEIGHTS
+    cache: list[tuple[tuple[int, ...], int, int]] = field(default_factory=list)
+
+
+def encode_position(position: engine.Position) -> bytes:
+    """Return the compact binary encoding of position, including its move history
+
+    Raise ValueError if the board is too large for the format, i.e. rows, cols or connect_n is above
+    MAX_DIMENSION.
+    """
+    if max(position.rows, position.cols, position.connect_n) > MAX_DIMENSION:
+        raise ValueError(f'A {position.rows} x {position.cols} board with connect_n {position.connect_n} is too '
+                         f'large for a snapshot (at most {MAX_DIMENSION} each)')
+    size = _board_size(position.rows, position.cols)
+    return b''.join([
+        POSITION_HEADER.pack(position.rows, position.cols, position.connect_n, position.turn, len(position.moves)),
+        position.bitboards[constants.PLAYER1].to_bytes(size, 'little'),
+        position.bitboards[constants.PLAYER2].to_bytes(size, 'little'),
+        bytes(position.moves)
+    ])
+
+
+def decode_position(data: bytes, square_size: int = constants.SQUARE_SIZE) -> engine.Position:
+    """Return the position encoded in data by encode_position
+
+    Raise ValueError if data is not a valid encoding.
+    """
+    position, end = _read_position(memoryview(data), 0, square_size)
+    if end != len(data):
+        raise ValueError('Trailing bytes after the position')
+    return position
+
+
+def encode(snapshot: Snapshot) -> bytes:
+    """Return the binary encoding of snapshot
+
+    Raise ValueError if the seed is not between MIN_SEED and MAX_SEED, or the board is too large for the format
+    (see encode_position).
+    """
+    if snapshot.seed is not None and not MIN_SEED <= snapshot.seed <= MAX_SEED:
+        raise ValueError(f'The seed {snapshot.seed} does not fit in a snapshot (between {MIN_SEED} and {MAX_SEED})')
+    position = snapshot.position
+    flags = ((HAS_SEED if snapshot.seed is not None else 0) | (HAS_AI_LEVEL if snapshot.ai_level is not None else 0)
+             | (HAS_RNG_STATE if snapshot.rng_state is not None else 0))
+    parts = [
+        HEADER.pack(MAGIC, VERSION, flags, position.config.square_size, PLAYER_KINDS.index(snapshot.player2),
+                    snapshot.ai_level or 0, snapshot.seed or 0, snapshot.move_target, len(snapshot.cache)),
+        encode_position(position)
+    ]
+    if snapshot.rng_state is not None:
+        _, words, gauss_next = snapshot.rng_state
+        parts.append(RNG_STATE.pack(*words, math.nan if gauss_next is None else gauss_next))
+    if snapshot.cache:
+        parts.append(WEIGHTS_FORMAT.pack(*snapshot.weights.as_vector()))
+        for cells, piece, score in snapshot.cache:
+            parts.append(bytes(cells))
+            parts.append(CACHE_ENTRY.pack(piece, score))
+    return b''.join(parts)
+
+
+def decode(data: bytes) -> Snapshot:
+    """Return the snapshot encoded in data by encode
+
+    Raise ValueError if data is not a valid snapshot.
+    """
+    view = memoryview(data)
+    try:
+        magic, version, flags, square_size, kind, ai_level, seed, move_target, cache_size = \
+            HEADER.unpack_from(view, 0)
+    except struct.error:
+        raise ValueError('Truncated snapshot header') from None
+    if magic != MAGIC:
+        raise ValueError('Not a Connect N snapshot')
+    if version != VERSION:
+        raise ValueError(f'Unsupported snapshot version {version}')
+    if kind >= len(PLAYER_KINDS):
+        raise ValueError(f'Unknown player kind {kind}')
+    position, offset = _read_position(view, HEADER.size, square_size)
+    snapshot = Snapshot(position, PLAYER_KINDS[kind], seed if flags & HAS_SEED else None, move_target,
+                        ai_level if flags & HAS_AI_LEVEL else None)
+    if flags & HAS_RNG_STATE:
+        try:
+            *words, gauss_next = RNG_STATE.unpack_from(view, offset)
+        except struct.error:
+            raise ValueError('The random state of the snapshot is truncated') from None
+        snapshot.rng_state = (RNG_VERSION, tuple(words), None if math.isnan(gauss_next) else gauss_next)
+        offset += RNG_STATE.size
+
+    if cache_size:
+        cell_count = position.rows * position.cols
+        entry_size = cell_count + CACHE_ENTRY.size
+        if len(view) != offset + WEIGHTS_FORMAT.size + cache_size * entry_size:
+            raise ValueError('The evaluation cache of the snapshot is truncated')
+        snapshot.weights = EvalWeights.from_vector(WEIGHTS_FORMAT.unpack_from(view, offset))
+        offset += WEIGHTS_FORMAT.size
+        for _ in range(cache_size):
+            cells = tuple(view[offset:offset + cell_count])
+            piece, score = CACHE_ENTRY.unpack_from(view, offset + cell_count)
+            snapshot.cache.append((cells, piece, score))
+            offset += entry_size
+    elif offset != len(view):
+        raise ValueError('Trailing bytes after the snapshot')
+    return snapshot
+
+
+def save(path: str, snapshot: Snapshot) -> None:
+    """Write snapshot to the file at path. The file is replaced atomically, so an interrupted save never
+    leaves a truncated snapshot behind."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(encode(snapshot))
+    os.replace(temp_path, path)
+
+
+def load(path: str) -> Snapshot:
+    """Return the snapshot saved at path
+
+    Raise ValueError if the file is not a valid snapshot.
+    """
+    with open(path, 'rb') as file:
+        return decode(file.read())
+
+
+def _board_size(rows: int, cols: int) -> int:
+    """Return the number of bytes of one bitboard of a rows x cols board"""
+    return (cols * (rows + 1) + 7) // 8
+
+
+def _read_position(view: memoryview, offset: int, square_size: int) -> tuple[engine.Position, int]:
+    """Return the position encoded at offset in view and the offset just after it
+
+    Raise ValueError if it is not a valid encoding.
+    """
+    try:
+        rows, cols, connect_n, turn, move_count = POSITION_HEADER.unpack_from(view, offset)
+    except struct.error:
+        raise ValueError('Truncated position') from None
+    position = engine.Position(GameConfig(rows, cols, connect_n, square_size))
+    size = _board_size(rows, cols)
+    offset += POSITION_HEADER.size
+    end = offset + 2 * size + move_count
+    if len(view) < end:
+        raise ValueError('Truncated position')
+    if turn not in (constants.PLAYER1, constants.PLAYER2):
+        raise ValueError(f'Unknown player to move {turn}')
+
+    board1 = int.from_bytes(view[offset:offset + size], 'little')
+    board2 = int.from_bytes(view[offset + size:offset + 2 * size], 'little')
+    if board1 & board2:
+        raise ValueError('Both players fill the same cell')
+    for col in range(cols):
+        column = ((board1 | board2) & engine.column_mask(rows, col)) >> (col * (rows + 1))
+        if column & (column + 1):
+            raise ValueError(f'Column {col} has a floating piece')
+        position.heights[col] = column.bit_length()
+    if (board1 | board2) & ~sum(engine.column_mask(rows, col) for col in range(cols)):
+        raise ValueError('A piece lies outside the board')
+    position.bitboards[constants.PLAYER1], position.bitboards[constants.PLAYER2] = board1, board2
+    position.turn = turn
+    position.moves = list(view[offset + 2 * size:end])
+    return position, end
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['constants', 'config', 'engine', 'latency', 'weights', 'dataclasses', 'math', 'os',
+                          'struct', 'typing'],  # the names (strs) of imported modules
+        'allowed-io': ['save', 'load'],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })
@@ -0,0 +1,118 @@
+"""This Python module contains the evaluation weight tuner of Connect N project.
+
+It reads the self-play shards written by selfplay.py as a stream and fits, separately for every board shape,
+the EvalWeights that best predict each record's result. The evaluation is linear in its weights
+(see engine.eval_features), so the fit is a logistic regression trained by stochastic gradient descent:
+
+    P(player to move wins) = sigmoid(evaluation / SCORE_SCALE)
+
+The training target mixes the game outcome with the search score of the position. The fitted weights are saved
+to a JSON weights file that AIPlayer can load (see weights.load_weights and main.py):
+
+    python tuner.py data/ weights.json --epochs 3
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import random
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import engine
+import selfplay
+import weights
+from weights import DEFAULT_WEIGHTS, EvalWeights
+
+# Evaluation (and search score) units per unit of log-odds of winning
+SCORE_SCALE = 400.0
+SHUFFLE_BUFFER = 10_000
+
+
+def sigmoid(x: float) -> float:
+    """Return the logistic function of x, without overflowing for large |x|"""
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    exp_x = math.exp(x)
+    return exp_x / (1.0 + exp_x)
+
+
+def shuffled(records: Iterable[Any], buffer_size: int, rng: random.Random) -> Iterator[Any]:
+    """Yield records in a locally shuffled order, keeping at most buffer_size records in memory"""
+    buffer = []
+    for record in records:
+        if len(buffer) < buffer_size:
+            buffer.append(record)
+        else:
+            i = rng.randrange(buffer_size)
+            yield buffer[i]
+            buffer[i] = record
+    rng.shuffle(buffer)
+    yield from buffer
+
+
+def tune(read_records: Callable[[], Iterable[dict[str, Any]]], epochs: int = 3, learning_rate: float = 1e-4,
+         outcome_weight: float = 0.5, regularization: float = 1e-4, initial: EvalWeights = DEFAULT_WEIGHTS,
+         seed: int = 0) -> dict[str, EvalWeights]:
+    """Fit the evaluation weights of every board shape in the records returned by read_records, which is called
+    once per epoch and may return a generator, and return them by shape key (see weights.shape_key).
+
+    Every shape starts from initial. The target of each record is outcome_weight * outcome +
+    (1 - outcome_weight) * sigmoid(score / SCORE_SCALE), and the weights are pulled towards initial with the
+    given L2 regularization, since some window classes are nearly collinear.
+    """
+    rng = random.Random(seed)
+    prior = [weight / SCORE_SCALE for weight in initial.as_vector()]
+    params = {}
+    for _ in range(epochs):
+        for record in shuffled(read_records(), SHUFFLE_BUFFER, rng):
+            position = selfplay.record_position(record)
+            theta = params.setdefault(weights.shape_key(position.config), prior.copy())
+            features = engine.eval_features(position, record['turn'])
+            target = (outcome_weight * record['outcome']
+                      + (1 - outcome_weight) * sigmoid(record['score'] / SCORE_SCALE))
+            error = sigmoid(sum(t * x for t, x in zip(theta, features))) - target
+            for i, x in enumerate(features):
+                theta[i] -= learning_rate * (error * x + regularization * (theta[i] - prior[i]))
+    return {key: EvalWeights.from_vector([t * SCORE_SCALE for t in theta]) for key, theta in params.items()}
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Fit weights to the shards in a directory and merge them into a weights file"""
+    parser = argparse.ArgumentParser(description='Fit Connect N evaluation weights to self-play records.')
+    parser.add_argument('directory', help='directory holding the self-play shards')
+    parser.add_argument('weights_file', help='JSON weights file to update')
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--learning-rate', type=float, default=1e-4)
+    parser.add_argument('--outcome-weight', type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    table = weights.load_weights(args.weights_file)
+    fitted = tune(lambda: selfplay.read_shards(args.directory), args.epochs, args.learning_rate,
+                  args.outcome_weight)
+    table.update(fitted)
+    weights.save_weights(args.weights_file, table)
+    for key, eval_weights in fitted.items():
+        print(f'{key}: {eval_weights}')
+
+
+if __name__ == '__main__':
+    main()
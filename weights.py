@@ -0,0 +1,103 @@
+"""This Python module contains the evaluation weights of the AI players of Connect N project.
+
+The AI scores a position by classifying every window of CONNECT_N cells (see player.AIPlayer.evaluate_window)
+and adding the weight of each class, plus a bonus for every piece in the center column. The weights used to be
+hard-coded; they now form an EvalWeights parameter set which tuner.py can fit per board shape.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of TA's
+responsible for grading works of the CSC111 students at the University
+of Toronto St. George campus. All forms of distribution of this code,
+whether as given or with any changes, are expressly prohibited. For
+more information on copyright for Connect N materials, please consult
+one of our team members eaither face-to-face or via email.
+
+EMAILS:
+Ahmad Abugharbieh: ahmad.abugharbieh@mail.utoronto.ca
+Jerry YAN: jerryzhixi.yan@mail.utoronto.ca
+Burak UNAT: burak.unat@mail.utoronto.ca
+Tim Shen: shutian.shen@mail.utoronto.ca
+
+This file is Copyright (c) 2023 Jerry Yan, Burak Unat, Ahmad Abugharbieh
+and Tim Shen.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+import os
+from typing import Sequence
+
+from config import GameConfig
+
+# The number of weights in an EvalWeights: 4 own window classes, 4 opponent window classes and the center bonus
+NUM_WEIGHTS = 9
+
+
+@dataclass(frozen=True)
+class EvalWeights:
+    """The weights of the AI's evaluation.
+
+    Instance Attributes:
+    - own: the score of a window holding, for the evaluated player, CONNECT_N pieces; CONNECT_N - 1 pieces and
+      one empty cell; CONNECT_N - 2 pieces and two empty cells; anything else
+    - opp: the score of a window holding, for the opponent, CONNECT_N - 1 pieces and one empty cell;
+      CONNECT_N - 2 pieces and two empty cells; CONNECT_N - 3 pieces and three empty cells; anything else
+    - center: the score of each of the evaluated player's pieces in the center column
+
+    Representation Invariants:
+    - len(self.own) == 4 and len(self.opp) == 4
+    """
+    own: tuple[int, int, int, int] = (1000, 40, 10, 1)
+    opp: tuple[int, int, int, int] = (-800, -400, -10, -1)
+    center: int = 6
+
+    def as_vector(self) -> list[int]:
+        """Return these weights as one vector of NUM_WEIGHTS numbers, in the order of engine.eval_features"""
+        return [*self.own, *self.opp, self.center]
+
+    @classmethod
+    def from_vector(cls, vector: Sequence[float]) -> EvalWeights:
+        """Return the weights in vector (see EvalWeights.as_vector), rounded to integers"""
+        rounded = [round(weight) for weight in vector]
+        return cls(tuple(rounded[0:4]), tuple(rounded[4:8]), rounded[8])
+
+
+DEFAULT_WEIGHTS = EvalWeights()
+
+
+def shape_key(game_config: GameConfig) -> str:
+    """Return the key of game_config's board shape in a weights file, e.g. '6x7x4'"""
+    return f'{game_config.rows}x{game_config.cols}x{game_config.connect_n}'
+
+
+def load_weights(path: str) -> dict[str, EvalWeights]:
+    """Return the weights saved at path by save_weights, by shape key. Return {} if there is no file at path."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        table = json.load(file)
+    return {key: EvalWeights.from_vector(vector) for key, vector in table.items()}
+
+
+def save_weights(path: str, table: dict[str, EvalWeights]) -> None:
+    """Save the weights in table (by shape key) to path as JSON"""
+    with open(path, 'w') as file:
+        json.dump({key: weights.as_vector() for key, weights in table.items()}, file, indent=2)
+
+
+def weights_for(game_config: GameConfig, table: dict[str, EvalWeights]) -> EvalWeights:
+    """Return the weights in table for game_config's board shape, or DEFAULT_WEIGHTS if it has none"""
+    return table.get(shape_key(game_config), DEFAULT_WEIGHTS)
+
+
+if __name__ == '__main__':
+    import python_ta
+
+    python_ta.check_all(config={
+        'extra-imports': ['config', 'dataclasses', 'json', 'os', 'typing'],  # the names (strs) of imported modules
+        'allowed-io': ['load_weights', 'save_weights'],  # the names (strs) of functions that call print/open/input
+        'max-line-length': 120
+    })